@@ -1,37 +1,169 @@
 import streamlit as st
-import pandas as pd
-import tempfile
-import os
 from datetime import datetime
-import json
+import orjson
 import traceback
+import importlib.util
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Form 1040 lines shown in the Generator tab, in display order
+LINE_MAP = (
+    ("1", "Wages, salaries, tips"),
+    ("7", "Total income"),
+    ("11", "Adjusted Gross Income (AGI)"),
+    ("12", "Standard deduction"),
+    ("15", "Taxable income"),
+    ("16", "Tax"),
+    ("19", "Child tax credit (non-refundable)"),
+    ("27", "Earned income credit (EITC)"),
+    ("28", "Additional child tax credit"),
+    ("24", "Total tax"),
+    ("25a", "Federal income tax withheld"),
+    ("31", "Total payments"),
+    ("34", "Refund"),
+    ("37", "Amount you owe"),
+)
+# Lines shown even when the amount is zero
+FORCE_SHOW = frozenset({"12", "16", "24", "31", "34", "37"})
+
+# Filing status labels <-> IRSTaxEngine filing_status keys
+DISPLAY_TO_KEY = {
+    "Head of Household": "head_of_household",
+    "Single": "single",
+    "Married Filing Jointly": "married_joint",
+    "Married Filing Separately": "married_separate",
+    "Qualifying Surviving Spouse": "surviving_spouse",
+}
+KEY_TO_DISPLAY = {key: label for label, key in DISPLAY_TO_KEY.items()}
+
+# Sample taxpayer loaded from the sidebar
+WHITNEY_EXAMPLE = {
+    "name": "Whitney M. Refund",
+    "ssn": "400-00-4702",
+    "status": "Head of Household",
+    "dependents": 1,
+    "wages": 26263.0,
+    "fed_tax": 264.0,
+    "interest": 0.0,
+    "dividends": 0.0,
+    "daycare": 3100.0
+}
 
 # Page config
 st.set_page_config(page_title="Tax 1040 Tool", layout="wide")
 
 st.title("📊 Complete IRS Form 1040 Automation")
 
-# Import modules - FIXED IMPORT
-try:
-    from document_processor import PDFProcessor
+# Probe for the processing modules without importing them - Streamlit reruns
+# this script on every widget interaction, so the heavy PDF libraries are
+# only imported inside the handlers that need them
+MODULES_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("document_processor", "irs_rules_engine", "pdf_filler")
+)
+if not MODULES_AVAILABLE:
+    st.error("Import error: document_processor, irs_rules_engine or pdf_filler not found")
+
+
+@st.cache_resource
+def get_engine(status):
+    """Shared tax engine for a filing status (created once, reused on reruns)."""
     from irs_rules_engine import IRSTaxEngine
-    # Try importing Form1040PDF (correct class name)
+    engine = IRSTaxEngine()
+    engine.filing_status = status
+    # Warm up so the JIT-compiled bracket kernel is ready before the first click
+    engine.calculate_tax({"wages": 0.0})
+    return engine
+
+
+@st.cache_data
+def calc_tax(status, items):
+    """Memoized tax calculation keyed on filing status and sorted input items."""
+    return get_engine(status).calculate_tax(dict(items))
+
+
+@st.cache_resource
+def get_pdf_executor():
+    """Worker threads for PDF rendering, shared by all sessions."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def _render_filing_package(tax_calculations, extracted_data):
+    """Render the filing package once - Form 1040 alone is a by-product of it."""
     from pdf_filler import Form1040PDF
-    # Create alias for compatibility
-    PDFFiller = Form1040PDF
-    MODULES_AVAILABLE = True
-except ImportError as e:
-    st.error(f"Import error: {e}")
-    traceback.print_exc()
-    MODULES_AVAILABLE = False
+    filler = Form1040PDF()
+    package_bytes = filler.create_filing_package(tax_calculations, extracted_data)
+    return filler.form_1040_bytes, package_bytes
+
+
+def generate_form_1040():
+    """Start rendering the PDFs in the background so the UI can rerun at once."""
+    # Identical inputs produce an identical PDF - keep the one we already have
+    pdf_key = hashlib.blake2b(
+        orjson.dumps(
+            [st.session_state.tax_calculations, st.session_state.extracted_data],
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ),
+        digest_size=16
+    ).digest()
+    if pdf_key == st.session_state.pdf_key and (
+            st.session_state.form_1040_bytes or st.session_state.form_1040_future):
+        return
+    st.session_state.pdf_key = pdf_key
+    
+    # The JSON export is cheap - encode it once here instead of on every rerun
+    st.session_state.json_bytes = orjson.dumps(
+        {
+            "taxpayer_info": st.session_state.extracted_data,
+            "tax_calculations": st.session_state.tax_calculations,
+            "generated": datetime.now().isoformat()
+        },
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+        default=str
+    )
+    st.session_state.form_1040_bytes = None
+    st.session_state.filing_package_bytes = None
+    st.session_state.form_1040_future = get_pdf_executor().submit(
+        _render_filing_package,
+        st.session_state.tax_calculations,
+        st.session_state.extracted_data
+    )
+
+
+def collect_form_1040():
+    """Move a finished (or wait for a pending) background render into session state."""
+    future = st.session_state.form_1040_future
+    if future is None:
+        return
+    # Clear the future first - a failed render must not re-raise on every rerun
+    st.session_state.form_1040_future = None
+    try:
+        if not future.done():
+            with st.spinner("Rendering Form 1040 PDF..."):
+                future.result()
+        st.session_state.form_1040_bytes, st.session_state.filing_package_bytes = future.result()
+    except Exception as e:
+        # Forget the key too, so the next generate_form_1040 renders again
+        st.session_state.pdf_key = None
+        st.error(f"PDF generation error: {str(e)}")
+
 
 # Initialize session state
 if 'extracted_data' not in st.session_state:
     st.session_state.extracted_data = None
 if 'tax_calculations' not in st.session_state:
     st.session_state.tax_calculations = None
-if 'form_1040_path' not in st.session_state:
-    st.session_state.form_1040_path = None
+if 'form_1040_bytes' not in st.session_state:
+    st.session_state.form_1040_bytes = None
+if 'filing_package_bytes' not in st.session_state:
+    st.session_state.filing_package_bytes = None
+if 'form_1040_future' not in st.session_state:
+    st.session_state.form_1040_future = None
+if 'pdf_key' not in st.session_state:
+    st.session_state.pdf_key = None
+if 'json_bytes' not in st.session_state:
+    st.session_state.json_bytes = None
 if 'manual_mode' not in st.session_state:
     st.session_state.manual_mode = None
 if 'prefilled_data' not in st.session_state:
@@ -47,207 +179,22 @@ with st.sidebar:
     st.header("⚙️ Settings")
     filing_status = st.selectbox(
         "Filing Status",
-        ["Head of Household", "Single", "Married Filing Jointly", 
-         "Married Filing Separately", "Qualifying Surviving Spouse"],
+        list(DISPLAY_TO_KEY),
         index=0
     )
     
     st.header("💡 Quick Data")
     if st.button("Load Whitney Example"):
-        st.session_state.prefilled_data = {
-            "name": "Whitney M. Refund",
-            "ssn": "400-00-4702",
-            "status": "Head of Household",
-            "dependents": 1,
-            "wages": 26263.0,
-            "fed_tax": 264.0,
-            "interest": 0.0,
-            "dividends": 0.0,
-            "daycare": 3100.0
-        }
+        st.session_state.prefilled_data = WHITNEY_EXAMPLE.copy()
         st.success("Example data loaded! Go to Manual Entry tab.")
 
-# MAIN CONTENT
-if tab == "Manual Entry":
-    st.header("📝 Manual Data Entry")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Use prefilled data if available - SIMPLIFIED FIX
-        # Get prefilled data with default empty dict
-        prefilled = st.session_state.prefilled_data
-        
-        # Provide default empty string if prefilled is None or key doesn't exist
-        name_default = prefilled.get('name', '') if prefilled else ''
-        ssn_default = prefilled.get('ssn', '') if prefilled else ''
-        dependents_default = prefilled.get('dependents', 0) if prefilled else 0
-        
-        name = st.text_input("Taxpayer Name", value=name_default)
-        ssn = st.text_input("SSN", value=ssn_default)
-        status = st.selectbox(
-            "Filing Status",
-            ["Head of Household", "Single", "Married Filing Jointly"],
-            index=0
-        )
-        dependents = st.number_input("Dependents", 
-                                   value=dependents_default,
-                                   min_value=0, max_value=10)
-    
-    with col2:
-        # Get numeric defaults with safe access
-        wages_default = prefilled.get('wages', 0.0) if prefilled else 0.0
-        fed_tax_default = prefilled.get('fed_tax', 0.0) if prefilled else 0.0
-        interest_default = prefilled.get('interest', 0.0) if prefilled else 0.0
-        dividends_default = prefilled.get('dividends', 0.0) if prefilled else 0.0
-        daycare_default = prefilled.get('daycare', 0.0) if prefilled else 0.0
-        
-        wages = st.number_input("Wages", 
-                              value=float(wages_default),
-                              min_value=0.0, step=1000.0)
-        fed_tax = st.number_input("Federal Tax Withheld", 
-                                value=float(fed_tax_default),
-                                min_value=0.0, step=50.0)
-        interest = st.number_input("Interest Income", 
-                                 value=float(interest_default),
-                                 min_value=0.0, step=100.0)
-        dividends = st.number_input("Dividend Income", 
-                                  value=float(dividends_default),
-                                  min_value=0.0, step=100.0)
-        daycare = st.number_input("Daycare Expenses", 
-                                value=float(daycare_default),
-                                min_value=0.0, step=100.0)
-    
-    if st.button("Calculate & Generate Form 1040", type="primary", use_container_width=True):
-        if MODULES_AVAILABLE:
-            try:
-                manual_data = {
-                    "taxpayer_name": name,
-                    "taxpayer_ssn": ssn,
-                    "filing_status": status.lower().replace(" ", "_"),
-                    "dependent_count": dependents,
-                    "wages": wages,
-                    "federal_tax_withheld": fed_tax,
-                    "interest_income": interest,
-                    "dividends": dividends,
-                    "daycare_expenses": daycare
-                }
-                
-                # Calculate tax
-                engine = IRSTaxEngine()
-                engine.filing_status = manual_data["filing_status"]
-                
-                st.session_state.tax_calculations = engine.calculate_tax(manual_data)
-                st.session_state.extracted_data = manual_data
-                
-                # Generate Form 1040 PDF
-                filler = Form1040PDF()
-                st.session_state.form_1040_path = filler.create_form_1040(
-                    st.session_state.tax_calculations,
-                    st.session_state.extracted_data
-                )
-                
-                st.success("✅ Form 1040 generated successfully!")
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-                traceback.print_exc()
-        else:
-            st.error("Required modules not available.")
+# Reruns triggered inside a fragment redraw only the fragment (Streamlit >= 1.37)
+fragment = st.fragment if hasattr(st, "fragment") else (lambda func: func)
 
-elif tab == "PDF Upload":
-    st.header("📄 Upload Tax Documents")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("Client Documents")
-        uploaded_files = st.file_uploader(
-            "Upload W-2, 1099, etc.",
-            type=['pdf'],
-            accept_multiple_files=True,
-            key="client_docs"
-        )
-    
-    with col2:
-        st.subheader("Blank Form 1040 (Optional)")
-        st.info("Upload blank Form 1040 PDF for template filling")
-        blank_form = st.file_uploader(
-            "Upload blank Form 1040 PDF",
-            type=['pdf'],
-            key="blank_form"
-        )
-    
-    if uploaded_files and st.button("Process & Generate Form 1040", type="primary"):
-        if MODULES_AVAILABLE:
-            with st.spinner("Processing documents..."):
-                try:
-                    processor = PDFProcessor()
-                    client_files = []
-                    
-                    for uploaded_file in uploaded_files:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                            tmp.write(uploaded_file.getvalue())
-                            client_files.append(tmp.name)
-                    
-                    all_extracted = []
-                    for file_path in client_files:
-                        extracted = processor.process_pdf(file_path)
-                        if extracted:
-                            all_extracted.append(extracted)
-                        os.unlink(file_path)
-                    
-                    if all_extracted:
-                        st.session_state.extracted_data = processor.combine_extracted_data(all_extracted)
-                        
-                        # Use filing status from PDF or selected
-                        current_status = filing_status
-                        if st.session_state.extracted_data.get("filing_status"):
-                            status_map = {
-                                "head_of_household": "Head of Household",
-                                "married_joint": "Married Filing Jointly",
-                                "single": "Single"
-                            }
-                            pdf_status = st.session_state.extracted_data["filing_status"]
-                            if pdf_status in status_map:
-                                current_status = status_map[pdf_status]
-                                st.info(f"Using filing status from PDF: {current_status}")
-                        
-                        # Calculate tax
-                        engine = IRSTaxEngine()
-                        status_map = {
-                            "Head of Household": "head_of_household",
-                            "Single": "single",
-                            "Married Filing Jointly": "married_joint"
-                        }
-                        engine.filing_status = status_map.get(current_status, "single")
-                        
-                        st.session_state.tax_calculations = engine.calculate_tax(
-                            st.session_state.extracted_data
-                        )
-                        
-                        # Generate Form 1040
-                        filler = Form1040PDF()
-                        
-                        # Always create new form (simplified)
-                        st.session_state.form_1040_path = filler.create_form_1040(
-                            st.session_state.tax_calculations,
-                            st.session_state.extracted_data
-                        )
-                        
-                        st.success("✅ Form 1040 generated from uploaded documents!")
-                        st.rerun()
-                    else:
-                        st.error("Could not extract data from PDFs. Try manual entry.")
-                        
-                except Exception as e:
-                    st.error(f"Processing error: {str(e)}")
-                    traceback.print_exc()
-        else:
-            st.error("Required modules not available.")
 
-elif tab == "Form 1040 Generator":
+@fragment
+def render_generator():
+    """Form 1040 Generator tab - downloads and expanders rerun just this part."""
     st.header("🎯 Generate Form 1040")
     
     if not st.session_state.tax_calculations:
@@ -269,7 +216,7 @@ elif tab == "Form 1040 Generator":
         
         with col3:
             status = st.session_state.tax_calculations.get("filing_status", "single")
-            status_display = status.replace("_", " ").title()
+            status_display = KEY_TO_DISPLAY.get(status, status.replace("_", " ").title())
             st.metric("Filing Status", status_display)
         
         with col4:
@@ -304,43 +251,31 @@ elif tab == "Form 1040 Generator":
         
         # Create table
         line_data = []
-        line_map = {
-            "1": "Wages, salaries, tips",
-            "7": "Total income",
-            "11": "Adjusted Gross Income (AGI)",
-            "12": "Standard deduction",
-            "15": "Taxable income",
-            "16": "Tax",
-            "19": "Child tax credit (non-refundable)",
-            "27": "Earned income credit (EITC)",
-            "28": "Additional child tax credit",
-            "24": "Total tax",
-            "25a": "Federal income tax withheld",
-            "31": "Total payments",
-            "34": "Refund",
-            "37": "Amount you owe"
-        }
+        for line_num, desc in LINE_MAP:
+            amount = lines.get(line_num)
+            if amount is None:
+                continue
+            if amount or line_num in FORCE_SHOW:
+                line_data.append({
+                    "Line": line_num,
+                    "Description": desc,
+                    "Amount": amount
+                })
         
-        for line_num, desc in line_map.items():
-            if line_num in lines:
-                amount = lines[line_num]
-                if amount != 0 or line_num in ["12", "16", "24", "31", "34", "37"]:
-                    line_data.append({
-                        "Line": line_num,
-                        "Description": desc,
-                        "Amount": f"${amount:,.2f}"
-                    })
-        
-        st.dataframe(pd.DataFrame(line_data), hide_index=True, use_container_width=True)
+        # Keep amounts numeric and let the Styler format the whole column;
+        # the line number is the index, so no RangeIndex column shows up
+        import pandas as pd
+        st.table(pd.DataFrame(line_data, columns=["Line", "Description", "Amount"])
+                 .set_index("Line").style.format({"Amount": "${:,.2f}"}))
         
         # ===== DOWNLOAD SECTION =====
         st.subheader("📥 Download Form 1040")
         
-        if MODULES_AVAILABLE and st.session_state.form_1040_path and os.path.exists(st.session_state.form_1040_path):
+        collect_form_1040()
+        
+        if MODULES_AVAILABLE and st.session_state.form_1040_bytes:
             try:
-                # Read PDF
-                with open(st.session_state.form_1040_path, "rb") as f:
-                    pdf_bytes = f.read()
+                pdf_bytes = st.session_state.form_1040_bytes
                 
                 # Download buttons
                 col1, col2, col3 = st.columns(3)
@@ -356,49 +291,28 @@ elif tab == "Form 1040 Generator":
                     )
                 
                 with col2:
-                    # Create complete package
-                    try:
-                        filler = Form1040PDF()
-                        package_path = filler.create_filing_package(
-                            st.session_state.tax_calculations,
-                            st.session_state.extracted_data
-                        )
-                        
-                        with open(package_path, "rb") as f:
-                            package_bytes = f.read()
-                        
+                    # Complete package (rendered together with the form)
+                    if st.session_state.filing_package_bytes:
                         st.download_button(
                             label="📦 Complete Filing Package",
-                            data=package_bytes,
+                            data=st.session_state.filing_package_bytes,
                             file_name=f"Tax_Package_{datetime.now().strftime('%Y%m%d')}.pdf",
                             mime="application/pdf",
                             use_container_width=True
                         )
-                        
-                        # Clean up
-                        os.remove(package_path)
-                    except Exception as e:
+                    else:
                         st.info("Simple PDF only available")
                 
                 with col3:
-                    # JSON data
-                    json_data = {
-                        "taxpayer_info": st.session_state.extracted_data,
-                        "tax_calculations": st.session_state.tax_calculations,
-                        "generated": datetime.now().isoformat()
-                    }
-                    
+                    # JSON data (encoded when the form was generated)
                     st.download_button(
                         label="📊 Download Data (JSON)",
-                        data=json.dumps(json_data, indent=2),
+                        data=st.session_state.json_bytes,
                         file_name=f"Tax_Data_{datetime.now().strftime('%Y%m%d')}.json",
                         mime="application/json",
                         use_container_width=True
                     )
                 
-                # Clean up main PDF
-                os.remove(st.session_state.form_1040_path)
-                
                 # Preview
                 with st.expander("👀 What's in the Form 1040 PDF?", expanded=True):
                     st.markdown(f"""
@@ -464,6 +378,147 @@ elif tab == "Form 1040 Generator":
             - Taxpayer Assistance Centers: [Find Local Help](https://www.irs.gov/help/contact-us)
             """)
 
+
+# MAIN CONTENT
+if tab == "Manual Entry":
+    st.header("📝 Manual Data Entry")
+    
+    col1, col2 = st.columns(2)
+    
+    # Read prefilled data once - session_state lookups go through a proxy
+    prefilled = st.session_state.prefilled_data or {}
+    
+    with col1:
+        name = st.text_input("Taxpayer Name", value=prefilled.get('name', ''))
+        ssn = st.text_input("SSN", value=prefilled.get('ssn', ''))
+        status = st.selectbox(
+            "Filing Status",
+            ["Head of Household", "Single", "Married Filing Jointly"],
+            index=0
+        )
+        dependents = st.number_input("Dependents", 
+                                   value=prefilled.get('dependents', 0),
+                                   min_value=0, max_value=10)
+    
+    with col2:
+        wages = st.number_input("Wages", 
+                              value=float(prefilled.get('wages', 0.0)),
+                              min_value=0.0, step=1000.0)
+        fed_tax = st.number_input("Federal Tax Withheld", 
+                                value=float(prefilled.get('fed_tax', 0.0)),
+                                min_value=0.0, step=50.0)
+        interest = st.number_input("Interest Income", 
+                                 value=float(prefilled.get('interest', 0.0)),
+                                 min_value=0.0, step=100.0)
+        dividends = st.number_input("Dividend Income", 
+                                  value=float(prefilled.get('dividends', 0.0)),
+                                  min_value=0.0, step=100.0)
+        daycare = st.number_input("Daycare Expenses", 
+                                value=float(prefilled.get('daycare', 0.0)),
+                                min_value=0.0, step=100.0)
+    
+    if st.button("Calculate & Generate Form 1040", type="primary", use_container_width=True):
+        if MODULES_AVAILABLE:
+            try:
+                manual_data = {
+                    "taxpayer_name": name,
+                    "taxpayer_ssn": ssn,
+                    "filing_status": DISPLAY_TO_KEY[status],
+                    "dependent_count": dependents,
+                    "wages": wages,
+                    "federal_tax_withheld": fed_tax,
+                    "interest_income": interest,
+                    "dividends": dividends,
+                    "daycare_expenses": daycare
+                }
+                
+                # Calculate tax
+                st.session_state.tax_calculations = calc_tax(
+                    manual_data["filing_status"],
+                    tuple(sorted(manual_data.items()))
+                )
+                st.session_state.extracted_data = manual_data
+                
+                # Generate Form 1040 PDF
+                generate_form_1040()
+                
+                st.success("✅ Form 1040 generated successfully!")
+                
+            except Exception as e:
+                st.error(f"Error: {str(e)}")
+                traceback.print_exc()
+        else:
+            st.error("Required modules not available.")
+
+elif tab == "PDF Upload":
+    st.header("📄 Upload Tax Documents")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Client Documents")
+        uploaded_files = st.file_uploader(
+            "Upload W-2, 1099, etc.",
+            type=['pdf'],
+            accept_multiple_files=True,
+            key="client_docs"
+        )
+    
+    with col2:
+        st.subheader("Blank Form 1040 (Optional)")
+        st.info("Upload blank Form 1040 PDF for template filling")
+        blank_form = st.file_uploader(
+            "Upload blank Form 1040 PDF",
+            type=['pdf'],
+            key="blank_form"
+        )
+    
+    if uploaded_files and st.button("Process & Generate Form 1040", type="primary"):
+        if MODULES_AVAILABLE:
+            with st.spinner("Processing documents..."):
+                try:
+                    from document_processor import PDFProcessor
+                    processor = PDFProcessor()
+                    # Parse straight from the upload buffers - no temp files
+                    client_files = [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+                    
+                    # One merged MuPDF document for all the text layers
+                    results = processor.process_many(client_files)
+                    
+                    all_extracted = [extracted for extracted in results if extracted]
+                    
+                    if all_extracted:
+                        st.session_state.extracted_data = processor.combine_extracted_data(all_extracted)
+                        
+                        # Use filing status from PDF or selected
+                        current_status = filing_status
+                        pdf_status = st.session_state.extracted_data.get("filing_status")
+                        if pdf_status in KEY_TO_DISPLAY:
+                            current_status = KEY_TO_DISPLAY[pdf_status]
+                            st.info(f"Using filing status from PDF: {current_status}")
+                        
+                        # Calculate tax
+                        st.session_state.tax_calculations = calc_tax(
+                            DISPLAY_TO_KEY[current_status],
+                            tuple(sorted(st.session_state.extracted_data.items()))
+                        )
+                        
+                        # Generate Form 1040 (always create new form - simplified)
+                        generate_form_1040()
+                        
+                        st.success("✅ Form 1040 generated from uploaded documents!")
+                    else:
+                        st.error("Could not extract data from PDFs. Try manual entry.")
+                        
+                except Exception as e:
+                    st.error(f"Processing error: {str(e)}")
+                    traceback.print_exc()
+        else:
+            st.error("Required modules not available.")
+
+elif tab == "Form 1040 Generator":
+    render_generator()
+
 # Footer
 st.markdown("---")
 st.caption(f"IRS 2025 Tax Rules • Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
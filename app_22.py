@@ -1,10 +1,9 @@
 import streamlit as st
-import pandas as pd
-import tempfile
 import os
 from datetime import datetime
-import json
+import orjson
 import base64
+from concurrent.futures import ProcessPoolExecutor
 
 # Page config
 st.set_page_config(page_title="Tax 1040 Tool", layout="wide")
@@ -15,15 +14,55 @@ st.title("📊 Complete IRS Form 1040 Automation")
 try:
     from document_processor import PDFProcessor
     from irs_rules_engine import IRSTaxEngine
-    from pdf_filler import PDFFiller
+    from pdf_filler import Form1040PDF
     MODULES_AVAILABLE = True
 except ImportError as e:
     st.error(f"Missing modules: {e}")
     st.info("Install: pip install fpdf2 reportlab pypdf")
     MODULES_AVAILABLE = False
 
+@st.cache_resource
+def get_processor():
+    """One PDFProcessor for every session."""
+    return PDFProcessor()
+
+
+@st.cache_resource
+def get_extract_pool():
+    """One process pool for every session - started once, not per upload batch."""
+    return ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+
+@st.cache_data(show_spinner=False)
+def cached_extract(client_files):
+    """Parse a batch of uploads - rerunning with the same files skips the parse and OCR."""
+    # Each PDF is independent - parse them in parallel on the shared pool
+    return [extracted for extracted in get_extract_pool().map(get_processor().process_pdf_bytes, client_files)
+            if extracted]
+
+
+@st.cache_data(show_spinner=False)
+def cached_tax(filing_status, data):
+    """Tax calculation keyed on the filing status and input data."""
+    engine = IRSTaxEngine()
+    engine.filing_status = filing_status
+    return engine.calculate_tax(data)
+
+
+@st.cache_data(show_spinner=False)
+def cached_form_1040(tax_calculations, extracted_data):
+    """Form 1040 bytes for these inputs - rendered once, not on every rerun."""
+    return Form1040PDF().create_form_1040(tax_calculations, extracted_data)
+
+
+@st.cache_data(show_spinner=False)
+def cached_filing_package(tax_calculations, extracted_data):
+    """Filing package bytes - built once per input, not on every rerun."""
+    return Form1040PDF().create_filing_package(tax_calculations, extracted_data)
+
+
 # Initialize session state
-for key in ['extracted_data', 'tax_calculations', 'form_1040_path', 'manual_mode']:
+for key in ['extracted_data', 'tax_calculations', 'form_1040_bytes', 'manual_mode']:
     if key not in st.session_state:
         st.session_state[key] = None
 
@@ -111,15 +150,11 @@ if tab == "Manual Entry":
             }
             
             # Calculate tax
-            engine = IRSTaxEngine()
-            engine.filing_status = manual_data["filing_status"]
-            
-            st.session_state.tax_calculations = engine.calculate_tax(manual_data)
+            st.session_state.tax_calculations = cached_tax(manual_data["filing_status"], manual_data)
             st.session_state.extracted_data = manual_data
             
             # Generate Form 1040 PDF
-            filler = PDFFiller()
-            st.session_state.form_1040_path = filler.create_form_1040_pdf(
+            st.session_state.form_1040_bytes = cached_form_1040(
                 st.session_state.tax_calculations,
                 st.session_state.extracted_data
             )
@@ -157,20 +192,10 @@ elif tab == "PDF Upload":
     if uploaded_files and st.button("Process & Generate Form 1040", type="primary"):
         if MODULES_AVAILABLE:
             with st.spinner("Processing documents..."):
-                processor = PDFProcessor()
-                client_files = []
-                
-                for uploaded_file in uploaded_files:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                        tmp.write(uploaded_file.getvalue())
-                        client_files.append(tmp.name)
-                
-                all_extracted = []
-                for file_path in client_files:
-                    extracted = processor.process_pdf(file_path)
-                    if extracted:
-                        all_extracted.append(extracted)
-                    os.unlink(file_path)
+                processor = get_processor()
+                # Parse straight from the upload buffers - no temp files
+                client_files = [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+                all_extracted = cached_extract(client_files)
                 
                 if all_extracted:
                     st.session_state.extracted_data = processor.combine_extracted_data(all_extracted)
@@ -187,41 +212,22 @@ elif tab == "PDF Upload":
                             filing_status = status_map[pdf_status]
                     
                     # Calculate tax
-                    engine = IRSTaxEngine()
                     status_map = {
                         "Head of Household": "head_of_household",
                         "Single": "single",
                         "Married Filing Jointly": "married_joint"
                     }
-                    engine.filing_status = status_map.get(filing_status, "single")
-                    
-                    st.session_state.tax_calculations = engine.calculate_tax(
+                    st.session_state.tax_calculations = cached_tax(
+                        status_map.get(filing_status, "single"),
                         st.session_state.extracted_data
                     )
                     
-                    # Generate Form 1040
-                    filler = PDFFiller()
-                    
-                    if blank_form:
-                        # Save blank form temporarily
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                            tmp.write(blank_form.getvalue())
-                            blank_path = tmp.name
-                        
-                        # Fill existing form
-                        st.session_state.form_1040_path = filler.fill_existing_form_1040(
-                            blank_path,
-                            st.session_state.tax_calculations,
-                            st.session_state.extracted_data
-                        )
-                        
-                        os.unlink(blank_path)
-                    else:
-                        # Create new form
-                        st.session_state.form_1040_path = filler.create_form_1040_pdf(
-                            st.session_state.tax_calculations,
-                            st.session_state.extracted_data
-                        )
+                    # Generate Form 1040 - Form1040PDF draws the whole form itself,
+                    # so an uploaded blank form doesn't change the output
+                    st.session_state.form_1040_bytes = cached_form_1040(
+                        st.session_state.tax_calculations,
+                        st.session_state.extracted_data
+                    )
                     
                     st.success("✅ Form 1040 generated from uploaded documents!")
                     
@@ -290,15 +296,13 @@ elif tab == "Form 1040 Generator":
                     "Amount": f"${amount:,.2f}"
                 })
         
-        st.dataframe(pd.DataFrame(lines_data), hide_index=True, use_container_width=True)
+        st.table(lines_data)
         
         # Download Section
         st.subheader("Download Form 1040")
         
-        if st.session_state.form_1040_path and os.path.exists(st.session_state.form_1040_path):
-            # Read PDF
-            with open(st.session_state.form_1040_path, "rb") as f:
-                pdf_bytes = f.read()
+        if st.session_state.form_1040_bytes:
+            pdf_bytes = st.session_state.form_1040_bytes
             
             col1, col2, col3 = st.columns(3)
             
@@ -315,15 +319,11 @@ elif tab == "Form 1040 Generator":
             with col2:
                 # Create complete package
                 if MODULES_AVAILABLE:
-                    filler = PDFFiller()
-                    package_path = filler.create_filing_package(
+                    package_bytes = cached_filing_package(
                         st.session_state.tax_calculations,
                         st.session_state.extracted_data
                     )
                     
-                    with open(package_path, "rb") as f:
-                        package_bytes = f.read()
-                    
                     st.download_button(
                         label="📦 Complete Filing Package",
                         data=package_bytes,
@@ -342,7 +342,7 @@ elif tab == "Form 1040 Generator":
                 
                 st.download_button(
                     label="📊 Download Data (JSON)",
-                    data=json.dumps(json_data, indent=2),
+                    data=orjson.dumps(json_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY, default=str),
                     file_name=f"Tax_Data_{datetime.now().strftime('%Y%m%d')}.json",
                     mime="application/json",
                     use_container_width=True
@@ -351,14 +351,11 @@ elif tab == "Form 1040 Generator":
             # Preview (first page)
             st.subheader("Form Preview")
             try:
-                from pdf2image import convert_from_path
-                images = convert_from_path(st.session_state.form_1040_path, first_page=1, last_page=1)
-                if images:
-                    # Save as temp file
-                    preview_path = tempfile.mktemp(suffix='_preview.jpg')
-                    images[0].save(preview_path, 'JPEG')
-                    
-                    st.image(preview_path, caption="Form 1040 Preview (Page 1)", use_container_width=True)
+                # Render page 1 in-process - no Poppler subprocess or temp JPEG
+                import pymupdf
+                with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                    pix = doc[0].get_pixmap(dpi=120)
+                st.image(pix.tobytes("png"), caption="Form 1040 Preview (Page 1)", use_container_width=True)
             except:
                 st.info("Preview not available. Download the PDF to view.")
         
@@ -1,37 +1,150 @@
-import pdfplumber
-import PyPDF2
+# pdfplumber, pypdfium2, pytesseract and pdf2image are imported inside the
+# extractors that use them - PyMuPDF handles most PDFs on its own
+import pymupdf
 import re
-import pytesseract
-from PIL import Image
-import pdf2image
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 import tempfile
 import os
+from io import BytesIO
+from functools import lru_cache
+from itertools import chain, islice
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pure-Python fallback - same results, just slower
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# ===== FIELD PATTERNS =====
+# Compiled once at import - _extract_fields_smart runs for every uploaded PDF
+_NAME_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"Client's First Name[,\s]*Initial[,\s]*and Last Name[:\s]*([^\n]+)",
+    r"Taxpayer's Name[:\s]*([^\n]+)",
+    r"Name[:\s]*([A-Za-z\s\.]+[A-Za-z])",
+    r"Whitney M\. Refund",
+    r"James T\. Kirk",
+)]
+_SSN_PATTERNS = [re.compile(p) for p in (
+    r"Social Security Number[:\s]*([\d\*\-]+)",
+    r"SSN[:\s]*([\d\*\-]+)",
+    r"Client's Social Security Number[:\s]*([\d\*\-]+)",
+    r"(\d{3}[*\-\s]?\d{2}[*\-\s]?\d{4})"
+)]
+_NON_DIGIT_RE = re.compile(r'[^\d]')
+_HOH_RE = re.compile(r"Head of Household", re.IGNORECASE)
+_MFJ_RE = re.compile(r"Married Filing Joint", re.IGNORECASE)
+_SINGLE_RE = re.compile(r"Single", re.IGNORECASE)
+_DOLLAR_AMOUNT_RE = re.compile(r'\$\s*([\d,]+\.?\d*)')
+_BARE_AMOUNT_RE = re.compile(r'(?<!\$)(\d[\d,]*\.?\d{2})(?![\d])')
+_MONEY_RE = re.compile(r'(\d[\d,]*\.?\d*)')
+_DEPENDENT_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r"Dependent Name",
+    r"First Dependent",
+    r"Second Dependent",
+)]
+
+def _first_amount(line: str) -> float:
+    """First number on the line (commas stripped), or -1.0 if there is none."""
+    match = _MONEY_RE.search(line)
+    if not match:
+        return -1.0
+    return float(match.group(1).replace(',', ''))
+
+
+# Numeric fields summed across documents, in array column order
+NUMERIC_FIELDS = ("wages", "federal_tax_withheld", "interest_income",
+                  "dividends", "daycare_expenses")
+
+
+@njit(cache=True)
+def _sum_fields(values):
+    """Column totals of a (documents x NUMERIC_FIELDS) float64 array."""
+    return values.sum(axis=0)
+
 
 class PDFProcessor:
     """Smart PDF processor that tries multiple extraction methods."""
     
+    # First-page text needed to treat a PDF as born-digital (has a text layer)
+    TEXT_LAYER_MIN_CHARS = 100
+    
+    # Stop reading pages once this much text includes a wage statement -
+    # the remaining pages of a W-2 are copies of the same statement
+    EARLY_STOP_CHARS = 500
+    EARLY_STOP_LABELS = ("wages", "withheld")
+    
     def process_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """Try multiple methods to extract text."""
         print(f"\nProcessing PDF: {pdf_path}")
+        return self._process_source(pdf_path)
+    
+    def process_pdf_bytes(self, pdf_bytes: bytes) -> Dict[str, Any]:
+        """Same as process_pdf, for a PDF already in memory (e.g. an upload)."""
+        print(f"\nProcessing PDF from memory ({len(pdf_bytes)} bytes)")
+        return self._process_source(pdf_bytes)
+    
+    def process_many(self, sources: List[Union[str, bytes]]) -> List[Dict[str, Any]]:
+        """Process several PDFs, reading their text layers from one merged document."""
+        print(f"\nProcessing {len(sources)} PDFs as one batch")
+        combined = pymupdf.open()
+        page_ranges = []
+        for source in sources:
+            doc = self._open_with_pymupdf(source)
+            if doc is None:
+                # MuPDF can't read it - this one goes through the full ladder
+                page_ranges.append(None)
+                continue
+            start = combined.page_count
+            if self._is_born_digital(doc):
+                combined.insert_pdf(doc)
+            else:
+                print("No text layer found, skipping text extraction...")
+            page_ranges.append((start, combined.page_count))
+            doc.close()
+        
+        results = []
+        for source, page_range in zip(sources, page_ranges):
+            if page_range is None:
+                text = self._extract_text_layer(source)
+            else:
+                start, end = page_range
+                text = self._read_pages(combined[i].get_text("text") for i in range(start, end))
+                # Born-digital but PyMuPDF came up short, try pdfplumber
+                if end > start and len(text.strip()) < 100:
+                    text = self._extract_with_pdfplumber(source)
+            results.append(self._process_source(source, text))
+        
+        combined.close()
+        return results
+    
+    def _process_source(self, source: Union[str, bytes], text: str = None) -> Dict[str, Any]:
+        """Run the extraction ladder on a file path or raw PDF bytes.
         
-        # METHOD 1: Try standard text extraction first
-        text = self._extract_with_pdfplumber(pdf_path)
+        Pass ``text`` when the text layer was already read (see process_many).
+        """
+        if text is None:
+            text = self._extract_text_layer(source)
         
         # METHOD 2: If no text, try OCR
         if not text or len(text.strip()) < 100:
             print("Text extraction failed, trying OCR...")
-            text = self._extract_with_ocr(pdf_path)
+            text = self._extract_with_ocr(source)
         
-        # METHOD 3: Still no text? Use PyPDF2 as last resort
+        # METHOD 3: Still no text? Use PDFium as last resort
         if not text or len(text.strip()) < 50:
-            print("OCR failed, trying PyPDF2...")
-            text = self._extract_with_pypdf2(pdf_path)
+            print("OCR failed, trying PDFium...")
+            text = self._extract_with_pdfium(source)
         
-        # Save extracted text for debugging
+        # Save extracted text for debugging (opt-in: parallel workers would
+        # all be writing the same file)
         if text:
-            with open("extracted_text.txt", "w", encoding="utf-8") as f:
-                f.write(text)
+            if os.environ.get("PDFPROC_DEBUG_DUMP"):
+                with open("extracted_text.txt", "w", encoding="utf-8") as f:
+                    f.write(text)
             print(f"Extracted {len(text)} characters")
         
         # If still no text, use MANUAL DATA from your example
@@ -48,46 +161,135 @@ class PDFProcessor:
             "raw_text": text[:1000]
         }
     
-    def _extract_with_pdfplumber(self, pdf_path: str) -> str:
+    def _extract_text_layer(self, source: Union[str, bytes]) -> str:
+        """Read the embedded text layer (PyMuPDF, then pdfplumber); '' for scans."""
+        text = ""
+        doc = self._open_with_pymupdf(source)
+        
+        # Scanned PDFs have no text layer - skip the text extractors and go
+        # straight to OCR instead of parsing the document twice for nothing
+        if doc is not None and not self._is_born_digital(doc):
+            print("No text layer found, skipping text extraction...")
+        else:
+            # METHOD 1: Try fast text extraction with PyMuPDF (MuPDF C engine)
+            if doc is not None:
+                text = self._extract_with_pymupdf(doc)
+            
+            # METHOD 1b: PyMuPDF came up short, try pdfplumber's layout analysis
+            if not text or len(text.strip()) < 100:
+                text = self._extract_with_pdfplumber(source)
+        
+        if doc is not None:
+            doc.close()
+        
+        return text
+    
+    def _open_with_pymupdf(self, source: Union[str, bytes]):
+        """Open a path or raw bytes with PyMuPDF, or None if MuPDF can't."""
+        try:
+            if isinstance(source, bytes):
+                return pymupdf.open(stream=source, filetype="pdf")
+            return pymupdf.open(source)
+        except Exception as e:
+            print(f"PyMuPDF error: {e}")
+            return None
+    
+    def _is_born_digital(self, doc) -> bool:
+        """Cheap text-layer probe: only looks at the first page."""
+        if doc.page_count == 0:
+            return False
+        return len(doc[0].get_text("text").strip()) >= self.TEXT_LAYER_MIN_CHARS
+    
+    def _extract_with_pymupdf(self, doc) -> str:
+        """Extract with PyMuPDF from an open document."""
+        text = ""
+        try:
+            text = self._read_pages(page.get_text("text") for page in doc)
+        except Exception as e:
+            print(f"PyMuPDF error: {e}")
+        
+        return text
+    
+    def _read_pages(self, page_texts) -> str:
+        """Join page texts lazily, stopping once a wage statement has been read."""
+        pages = []
+        chars = 0
+        seen_label = False
+        for page_text in page_texts:
+            pages.append(page_text)
+            chars += len(page_text)
+            page_lower = page_text.lower()
+            seen_label = seen_label or any(label in page_lower for label in self.EARLY_STOP_LABELS)
+            if seen_label and chars > self.EARLY_STOP_CHARS:
+                break
+        
+        return "\n".join(pages)
+    
+    def _extract_with_pdfplumber(self, source: Union[str, bytes]) -> str:
         """Extract with pdfplumber."""
         text = ""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            import pdfplumber
+            with pdfplumber.open(self._as_file(source)) as pdf:
+                # Tax forms are already line-ordered - the simple extractor
+                # skips pdfminer's word clustering and layout pass
+                page_texts = (page.extract_text_simple(x_tolerance=3, y_tolerance=3) for page in pdf.pages)
+                text = self._read_pages(page_text for page_text in page_texts if page_text)
         except Exception as e:
             print(f"pdfplumber error: {e}")
         
         return text
     
-    def _extract_with_pypdf2(self, pdf_path: str) -> str:
-        """Extract with PyPDF2."""
+    def _extract_with_pdfium(self, source: Union[str, bytes]) -> str:
+        """Extract with pypdfium2 (takes a path or raw bytes directly)."""
         text = ""
+        pdf = None
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(source)
+            pages = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            # PDFium ends lines with \r\n - match the other extractors
+            text = "\n".join(pages).replace("\r\n", "\n")
         except Exception as e:
-            print(f"PyPDF2 error: {e}")
+            print(f"PDFium error: {e}")
+        finally:
+            # Release the native handles - the Streamlit worker is long-lived
+            if pdf is not None:
+                pdf.close()
         
         return text
     
-    def _extract_with_ocr(self, pdf_path: str) -> str:
+    def _extract_with_ocr(self, source: Union[str, bytes]) -> str:
         """Extract text using OCR."""
         text = ""
         try:
+            import pdf2image
+            import pytesseract
+            
             # Convert PDF to images
-            images = pdf2image.convert_from_path(pdf_path)
+            if isinstance(source, bytes):
+                images = pdf2image.convert_from_bytes(source)
+            else:
+                images = pdf2image.convert_from_path(source)
             
-            for i, image in enumerate(images):
-                # Use Tesseract OCR
-                page_text = pytesseract.image_to_string(image)
-                text += f"\n--- Page {i+1} ---\n{page_text}\n"
+            if images:
+                # One Tesseract run over a multi-page TIFF - its startup cost
+                # is paid once per document instead of once per page
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    tiff_path = os.path.join(tmp_dir, "pages.tiff")
+                    images[0].save(tiff_path, save_all=True, append_images=images[1:])
+                    ocr_text = pytesseract.image_to_string(tiff_path)
+                
+                # Tesseract ends every page with a form feed
+                text = "".join(
+                    f"\n--- Page {i+1} ---\n{page_text}\n"
+                    for i, page_text in enumerate(ocr_text.split("\f")[:len(images)])
+                )
                 
         except Exception as e:
             print(f"OCR error: {e}")
@@ -95,6 +297,11 @@ class PDFProcessor:
         
         return text
     
+    @staticmethod
+    def _as_file(source: Union[str, bytes]):
+        """pdfplumber takes a path or file object - wrap raw bytes."""
+        return BytesIO(source) if isinstance(source, bytes) else source
+    
     def _get_manual_data(self) -> Dict[str, Any]:
         """Return manual data for Whitney M. Refund example."""
         print("Using pre-defined data for Whitney M. Refund example")
@@ -115,20 +322,23 @@ class PDFProcessor:
         }
     
     def _extract_fields_smart(self, text: str) -> Dict[str, Any]:
+        """Smart field extraction, memoized on the text (a fresh dict every call)."""
+        return dict(self._extract_fields_cached(text))
+    
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _extract_fields_cached(text: str):
+        """Field items for ``text`` - a tuple so cached results can't be mutated."""
+        return tuple(PDFProcessor._find_fields(text).items())
+    
+    @staticmethod
+    def _find_fields(text: str) -> Dict[str, Any]:
         """Smart field extraction with multiple patterns."""
         fields = {}
         
         # ===== NAME EXTRACTION =====
-        name_patterns = [
-            r"Client's First Name[,\s]*Initial[,\s]*and Last Name[:\s]*([^\n]+)",
-            r"Taxpayer's Name[:\s]*([^\n]+)",
-            r"Name[:\s]*([A-Za-z\s\.]+[A-Za-z])",
-            r"Whitney M\. Refund",
-            r"James T\. Kirk",
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _NAME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 name = match.group(1).strip() if match.groups() else match.group(0).strip()
                 if name and len(name) > 3:
@@ -137,19 +347,12 @@ class PDFProcessor:
                     break
         
         # ===== SSN EXTRACTION =====
-        ssn_patterns = [
-            r"Social Security Number[:\s]*([\d\*\-]+)",
-            r"SSN[:\s]*([\d\*\-]+)",
-            r"Client's Social Security Number[:\s]*([\d\*\-]+)",
-            r"(\d{3}[*\-\s]?\d{2}[*\-\s]?\d{4})"
-        ]
-        
-        for pattern in ssn_patterns:
-            matches = re.findall(pattern, text)
+        for pattern in _SSN_PATTERNS:
+            matches = pattern.findall(text)
             for match in matches:
                 if isinstance(match, tuple):
                     match = match[0]
-                ssn_clean = re.sub(r'[^\d]', '', match)
+                ssn_clean = _NON_DIGIT_RE.sub('', match)
                 if len(ssn_clean) == 9:
                     fields["taxpayer_ssn"] = f"{ssn_clean[:3]}-{ssn_clean[3:5]}-{ssn_clean[5:]}"
                     print(f"✓ Found SSN: {fields['taxpayer_ssn']}")
@@ -158,72 +361,64 @@ class PDFProcessor:
                 break
         
         # ===== FILING STATUS =====
-        if re.search(r"Head of Household", text, re.IGNORECASE):
+        if _HOH_RE.search(text):
             fields["filing_status"] = "head_of_household"
             print("✓ Filing status: Head of Household")
-        elif re.search(r"Married Filing Joint", text, re.IGNORECASE):
+        elif _MFJ_RE.search(text):
             fields["filing_status"] = "married_joint"
             print("✓ Filing status: Married Filing Jointly")
-        elif re.search(r"Single", text, re.IGNORECASE):
+        elif _SINGLE_RE.search(text):
             fields["filing_status"] = "single"
             print("✓ Filing status: Single")
         
         # ===== FIND ALL NUMBERS =====
-        # Look for dollar amounts with different patterns
-        all_amounts = []
-        
-        # Pattern 1: $26,263.00
-        amounts1 = re.findall(r'\$\s*([\d,]+\.?\d*)', text)
-        all_amounts.extend(amounts1)
-        
-        # Pattern 2: 26,263.00 (without $)
-        amounts2 = re.findall(r'(?<!\$)(\d[\d,]*\.?\d{2})(?![\d])', text)
-        all_amounts.extend(amounts2)
-        
-        # Pattern 3: Numbers with "Wages" or "Withholding" nearby
+        # Numbers with "Wages" or "Withholding" nearby - the first match for
+        # each field wins (W-2 box 1 comes before "Social security wages")
         lines = text.split('\n')
-        for i, line in enumerate(lines):
+        for line in lines:
+            if "wages" in fields and "federal_tax_withheld" in fields and "daycare_expenses" in fields:
+                break
+            
             line_lower = line.lower()
+            is_wages = "wages" not in fields and ("wages" in line_lower or "salary" in line_lower)
+            is_withheld = "federal_tax_withheld" not in fields and (
+                ("federal" in line_lower and "withholding" in line_lower) or "withheld" in line_lower)
+            is_daycare = "daycare_expenses" not in fields and (
+                "daycare" in line_lower or "child care" in line_lower)
+            if not (is_wages or is_withheld or is_daycare):
+                continue
+            
+            # First number on the line - shared by every label it matches
+            amount = _first_amount(line)
+            if amount < 0:
+                continue
             
             # Wages
-            if "wages" in line_lower or "salary" in line_lower:
-                numbers = re.findall(r'(\d[\d,]*\.?\d*)', line)
-                if numbers:
-                    try:
-                        amount = float(numbers[0].replace(',', ''))
-                        if 1000 < amount < 1000000:  # Reasonable range
-                            fields["wages"] = amount
-                            print(f"✓ Found wages: ${amount:,.2f}")
-                    except:
-                        pass
+            if is_wages and 1000 < amount < 1000000:  # Reasonable range
+                fields["wages"] = amount
+                print(f"✓ Found wages: ${amount:,.2f}")
             
             # Federal withholding
-            if ("federal" in line_lower and "withholding" in line_lower) or "withheld" in line_lower:
-                numbers = re.findall(r'(\d[\d,]*\.?\d*)', line)
-                if numbers:
-                    try:
-                        amount = float(numbers[0].replace(',', ''))
-                        fields["federal_tax_withheld"] = amount
-                        print(f"✓ Found federal tax withheld: ${amount:,.2f}")
-                    except:
-                        pass
+            if is_withheld:
+                fields["federal_tax_withheld"] = amount
+                print(f"✓ Found federal tax withheld: ${amount:,.2f}")
             
             # Daycare expenses
-            if "daycare" in line_lower or "child care" in line_lower:
-                numbers = re.findall(r'(\d[\d,]*\.?\d*)', line)
-                if numbers:
-                    try:
-                        amount = float(numbers[0].replace(',', ''))
-                        fields["daycare_expenses"] = amount
-                        print(f"✓ Found daycare expenses: ${amount:,.2f}")
-                    except:
-                        pass
+            if is_daycare:
+                fields["daycare_expenses"] = amount
+                print(f"✓ Found daycare expenses: ${amount:,.2f}")
         
         # If we still don't have wages, use the largest number found
-        if "wages" not in fields and all_amounts:
+        if "wages" not in fields:
+            # Only the first 10 amounts are checked - scan lazily and stop
+            # there: $26,263.00 first, then 26,263.00 (without $)
+            all_amounts = islice(chain(
+                (match.group(1) for match in _DOLLAR_AMOUNT_RE.finditer(text)),
+                (match.group(1) for match in _BARE_AMOUNT_RE.finditer(text))
+            ), 10)
             try:
                 amounts_numeric = []
-                for amt in all_amounts[:10]:  # Check first 10 amounts
+                for amt in all_amounts:
                     try:
                         num = float(amt.replace(',', ''))
                         if 1000 < num < 1000000:  # Reasonable wage range
@@ -242,14 +437,9 @@ class PDFProcessor:
         dep_count = 0
         
         # Look for dependent sections
-        if re.search(r"Dependent Name", text, re.IGNORECASE):
-            dep_count += 1
-        
-        if re.search(r"First Dependent", text, re.IGNORECASE):
-            dep_count += 1
-        
-        if re.search(r"Second Dependent", text, re.IGNORECASE):
-            dep_count += 1
+        for pattern in _DEPENDENT_RES:
+            if pattern.search(text):
+                dep_count += 1
         
         # Look for child-related terms
         child_terms = ["Son", "Daughter", "Child", "Jeremy", "Brandon", "Andrea"]
@@ -293,6 +483,7 @@ class PDFProcessor:
             "daycare_expenses": 0.0,
         }
         
+        numeric_rows = []
         for data in all_data:
             fields = data.get("extracted_fields", {})
             
@@ -306,11 +497,8 @@ class PDFProcessor:
             if fields.get("filing_status"):
                 combined["filing_status"] = fields["filing_status"]
             
-            # Numeric fields
-            for field in ["wages", "federal_tax_withheld", "interest_income", 
-                         "dividends", "daycare_expenses"]:
-                if field in fields:
-                    combined[field] += fields[field]
+            # Numeric fields - summed in one compiled pass below
+            numeric_rows.append([fields.get(field, 0.0) for field in NUMERIC_FIELDS])
             
             # Dependent count
             if "dependent_count" in fields:
@@ -319,6 +507,10 @@ class PDFProcessor:
                     fields["dependent_count"]
                 )
         
+        values = np.array(numeric_rows, dtype=np.float64).reshape(-1, len(NUMERIC_FIELDS))
+        for field, total in zip(NUMERIC_FIELDS, _sum_fields(values)):
+            combined[field] = float(total)
+        
         print(f"\n=== COMBINED DATA ===")
         for key, value in combined.items():
             if value:
@@ -1,5 +1,61 @@
 from typing import Dict, Any
-import math
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pure-Python fallback - same results, just slower
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+logger = logging.getLogger(__name__)
+
+
+@njit(cache=True, error_model="numpy")
+def _tax_from_brackets(income, bracket_lo, bracket_hi, bracket_rate):
+    """Compiled bracket walk over parallel (lo, hi, rate) float64 arrays."""
+    tax = 0.0
+    prev_bracket = 0.0
+    
+    for i in range(bracket_rate.shape[0]):
+        if income > bracket_lo[i]:
+            taxable_in_bracket = min(income, bracket_hi[i]) - max(bracket_lo[i], prev_bracket)
+            tax += taxable_in_bracket * bracket_rate[i]
+            prev_bracket = bracket_hi[i]
+        else:
+            break
+    
+    return tax
+
+
+@njit(cache=True, error_model="numpy")
+def _eitc_from_table(wages, max_income, max_credit, phaseout_rate):
+    """Compiled EITC: full credit up to max_income, then a linear phase-out."""
+    if wages <= max_income:
+        return max_credit
+    return max(0.0, max_credit - (wages - max_income) * phaseout_rate)
+
+
+def _round_cents(values):
+    """Round an array to cents exactly like round(value, 2) does per value.
+    
+    np.round scales by 100 first, which can tip a value that sits just
+    below a half cent (e.g. 15157.094999...) the other way; those few
+    values are settled with round() itself.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    cents = np.round(values, 2)
+    scaled = values * 100.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-4
+    if near_half.any():
+        # .tolist() - round() on an np.float64 would use numpy's rounding again
+        cents[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return cents
+
 
 class IRSTaxEngine:
     """Fixed IRS tax calculator with proper 2025 rules and refund logic."""
@@ -13,6 +69,39 @@ class IRSTaxEngine:
         "surviving_spouse": 29200.00
     }
     
+    # 2025 TAX BRACKETS (Single)
+    TAX_BRACKETS_SINGLE = [
+        (0, 11600, 0.10),      # 10%
+        (11600, 47150, 0.12),  # 12%
+        (47150, 100525, 0.22), # 22%
+        (100525, 191950, 0.24), # 24%
+        (191950, 243725, 0.32), # 32%
+        (243725, 609350, 0.35), # 35%
+        (609350, float('inf'), 0.37) # 37%
+    ]
+    
+    # 2025 TAX BRACKETS (Married Filing Jointly / Surviving Spouse)
+    TAX_BRACKETS_MFJ = [
+        (0, 23200, 0.10),      # 10%
+        (23200, 94300, 0.12),  # 12%
+        (94300, 201050, 0.22), # 22%
+        (201050, 383900, 0.24), # 24%
+        (383900, 487450, 0.32), # 32%
+        (487450, 731200, 0.35), # 35%
+        (731200, float('inf'), 0.37) # 37%
+    ]
+    
+    # 2025 TAX BRACKETS (Married Filing Separately)
+    TAX_BRACKETS_MFS = [
+        (0, 11600, 0.10),      # 10%
+        (11600, 47150, 0.12),  # 12%
+        (47150, 100525, 0.22), # 22%
+        (100525, 191950, 0.24), # 24%
+        (191950, 243725, 0.32), # 32%
+        (243725, 365600, 0.35), # 35%
+        (365600, float('inf'), 0.37) # 37%
+    ]
+    
     # 2025 TAX BRACKETS (Head of Household)
     TAX_BRACKETS_HOH = [
         (0, 11600, 0.10),      # 10%
@@ -24,6 +113,19 @@ class IRSTaxEngine:
         (609350, float('inf'), 0.37) # 37%
     ]
     
+    # Same tables as (lo, hi, rate) float64 arrays for the compiled kernel,
+    # keyed like STANDARD_DEDUCTIONS
+    _BRACKETS = {
+        status: tuple(np.array(column, dtype=np.float64) for column in zip(*table))
+        for status, table in (
+            ("single", TAX_BRACKETS_SINGLE),
+            ("married_joint", TAX_BRACKETS_MFJ),
+            ("head_of_household", TAX_BRACKETS_HOH),
+            ("married_separate", TAX_BRACKETS_MFS),
+            ("surviving_spouse", TAX_BRACKETS_MFJ),
+        )
+    }
+    
     # 2025 CREDITS
     CHILD_TAX_CREDIT = 2000.00  # per child
     ADDITIONAL_CHILD_TAX_CREDIT_MAX = 1600.00  # refundable portion per child
@@ -33,157 +135,237 @@ class IRSTaxEngine:
         2: {"max_income": 53900, "max_credit": 7043},
         3: {"max_income": 57900, "max_credit": 7931}
     }
+    # Same table as float64 arrays indexed by dependent count (0-3)
+    _EITC_MAX_INCOME = np.array([info["max_income"] for info in EITC_2025.values()], dtype=np.float64)
+    _EITC_MAX_CREDIT = np.array([info["max_credit"] for info in EITC_2025.values()], dtype=np.float64)
+    _EITC_PHASEOUT = np.array([0.0765, 0.1598, 0.1598, 0.1598])  # Simplified phase-out
     
     def __init__(self):
         self.filing_status = "single"
     
     def calculate_tax(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate tax with proper IRS 2025 rules and refund logic."""
-        print(f"\n=== CALCULATING TAX FOR: {self.filing_status} ===")
-        
-        # Get data
-        wages = extracted_data.get("wages", 0)
-        federal_withheld = extracted_data.get("federal_tax_withheld", 0)
-        dependents = extracted_data.get("dependent_count", 0)
-        
-        print(f"Wages: ${wages:,.2f}")
-        print(f"Dependents: {dependents}")
-        print(f"Federal Withheld: ${federal_withheld:,.2f}")
+        summary, form_lines, form_lines_str = self._calculate_tax_cached(
+            self.filing_status,
+            extracted_data.get("wages", 0),
+            extracted_data.get("federal_tax_withheld", 0),
+            extracted_data.get("dependent_count", 0),
+            extracted_data.get("interest_income", 0),
+            extracted_data.get("dividends", 0),
+        )
         
+        # Fresh dicts on every call - callers are free to modify the result
+        return {
+            **dict(summary),
+            "form_1040_lines": dict(form_lines),
+            "form_1040_lines_str": dict(form_lines_str),
+            "filing_status": self.filing_status
+        }
+    
+    @classmethod
+    @lru_cache(maxsize=1024, typed=True)
+    def _calculate_tax_cached(cls, filing_status, wages, federal_withheld, dependents,
+                              interest_income, dividends) -> tuple:
+        """Numeric core of calculate_tax, memoized on its inputs (returns tuples)."""
         # ===== 1. STANDARD DEDUCTION =====
-        deduction = self.STANDARD_DEDUCTIONS.get(self.filing_status, 14600)
-        print(f"Standard Deduction ({self.filing_status}): ${deduction:,.2f}")
+        deduction = cls.STANDARD_DEDUCTIONS.get(filing_status, 14600)
         
         # ===== 2. TAXABLE INCOME =====
         taxable_income = max(0, wages - deduction)
-        print(f"Taxable Income: ${taxable_income:,.2f}")
         
         # ===== 3. TAX CALCULATION =====
-        if self.filing_status == "head_of_household":
-            tax = self._calculate_tax_brackets(taxable_income, self.TAX_BRACKETS_HOH)
-        else:
-            tax = self._calculate_tax_brackets(taxable_income, self.TAX_BRACKETS_HOH)
-        
-        print(f"Tax Before Credits: ${tax:,.2f}")
+        brackets = cls._BRACKETS.get(filing_status, cls._BRACKETS["single"])
+        # Tax and EITC are settled to cents before anything is derived from
+        # them, so lines 24/31/34/37 on the printed form add up
+        tax = round(cls._calculate_tax_brackets(taxable_income, brackets), 2)
         
         # ===== 4. CREDITS CALCULATION =====
         # Total Child Tax Credit available
-        total_child_credit = self.CHILD_TAX_CREDIT * dependents
+        total_child_credit = cls.CHILD_TAX_CREDIT * dependents
         
         # Non-refundable portion (can only offset tax)
         nonrefundable_child_credit = min(total_child_credit, tax)
         
         # Refundable portion (Additional Child Tax Credit)
         remaining_child_credit = total_child_credit - nonrefundable_child_credit
-        additional_child_credit = min(remaining_child_credit, self.ADDITIONAL_CHILD_TAX_CREDIT_MAX * dependents)
+        additional_child_credit = min(remaining_child_credit, cls.ADDITIONAL_CHILD_TAX_CREDIT_MAX * dependents)
         
         # Earned Income Credit (always refundable)
-        eitc = self._calculate_eitc(wages, dependents)
-        
-        print(f"Total Child Tax Credit: ${total_child_credit:,.2f}")
-        print(f"Non-refundable Child Credit: ${nonrefundable_child_credit:,.2f}")
-        print(f"Additional Child Tax Credit (refundable): ${additional_child_credit:,.2f}")
-        print(f"Earned Income Credit: ${eitc:,.2f}")
+        eitc = round(cls._calculate_eitc(wages, dependents), 2)
         
         # ===== 5. TAX AFTER CREDITS =====
         tax_after_nonrefundable = tax - nonrefundable_child_credit
         tax_after_all = max(0, tax_after_nonrefundable)  # Can't go negative with non-refundable credits
         
-        print(f"Tax After Non-refundable Credits: ${tax_after_all:,.2f}")
-        
         # ===== 6. REFUND CALCULATION =====
         # Refundable credits (can create refund even with $0 tax)
         total_refundable_credits = additional_child_credit + eitc + federal_withheld
         
-        # If tax_after_all is $0, all refundable credits become refund
-        if tax_after_all == 0:
-            refund = total_refundable_credits
-            amount_owed = 0
-        else:
-            # If there's still tax, refundable credits offset it first
-            refund_from_credits = max(0, total_refundable_credits - tax_after_all)
-            amount_owed = max(0, tax_after_all - total_refundable_credits)
-            refund = refund_from_credits
+        # Refundable credits offset any remaining tax first, the rest is
+        # refunded (with $0 tax all of it becomes the refund)
+        net = total_refundable_credits - tax_after_all
+        refund = max(0.0, net)
+        amount_owed = max(0.0, -net)
         
-        print(f"\n=== FINAL RESULT ===")
-        print(f"Total Refundable Amount: ${total_refundable_credits:,.2f}")
-        print(f"Final Tax Liability: ${tax_after_all:,.2f}")
-        
-        if refund > 0:
-            print(f"✅ REFUND: ${refund:,.2f}")
-        else:
-            print(f"⚠️ AMOUNT OWED: ${amount_owed:,.2f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"=== CALCULATING TAX FOR: {filing_status} ===")
+            logger.debug(f"Wages: ${wages:,.2f}")
+            logger.debug(f"Dependents: {dependents}")
+            logger.debug(f"Federal Withheld: ${federal_withheld:,.2f}")
+            logger.debug(f"Standard Deduction ({filing_status}): ${deduction:,.2f}")
+            logger.debug(f"Taxable Income: ${taxable_income:,.2f}")
+            logger.debug(f"Tax Before Credits: ${tax:,.2f}")
+            logger.debug(f"Total Child Tax Credit: ${total_child_credit:,.2f}")
+            logger.debug(f"Non-refundable Child Credit: ${nonrefundable_child_credit:,.2f}")
+            logger.debug(f"Additional Child Tax Credit (refundable): ${additional_child_credit:,.2f}")
+            logger.debug(f"Earned Income Credit: ${eitc:,.2f}")
+            logger.debug(f"Tax After Non-refundable Credits: ${tax_after_all:,.2f}")
+            logger.debug(f"Total Refundable Amount: ${total_refundable_credits:,.2f}")
+            if refund > 0:
+                logger.debug(f"REFUND: ${refund:,.2f}")
+            else:
+                logger.debug(f"AMOUNT OWED: ${amount_owed:,.2f}")
         
         # ===== 7. FORM 1040 LINES =====
         form_lines = {
-            "1": round(wages, 2),
-            "2b": round(extracted_data.get("interest_income", 0), 2),
-            "3b": round(extracted_data.get("dividends", 0), 2),
-            "7": round(wages, 2),
-            "11": round(wages, 2),  # AGI
-            "12": round(deduction, 2),
-            "15": round(taxable_income, 2),
-            "16": round(tax, 2),
-            "19": round(nonrefundable_child_credit, 2),  # Line 19: Child tax credit (non-refundable)
+            "1": wages,
+            "2b": interest_income,
+            "3b": dividends,
+            "7": wages,
+            "11": wages,  # AGI
+            "12": deduction,
+            "15": taxable_income,
+            "16": tax,
+            "19": nonrefundable_child_credit,  # Line 19: Child tax credit (non-refundable)
             # Line 27: Earned income credit (EITC)
-            "27": round(eitc, 2),
+            "27": eitc,
             # Line 28: Additional child tax credit (refundable portion)
-            "28": round(additional_child_credit, 2),
-            "24": round(tax_after_all, 2),
-            "25a": round(federal_withheld, 2),
-            "31": round(federal_withheld + additional_child_credit + eitc, 2),  # Total payments
+            "28": additional_child_credit,
+            "24": tax_after_all,
+            "25a": federal_withheld,
+            "31": federal_withheld + additional_child_credit + eitc,  # Total payments
         }
         
         if refund > 0:
-            form_lines["34"] = round(refund, 2)  # Line 34: Refund
+            form_lines["34"] = refund  # Line 34: Refund
             form_lines["37"] = 0
         else:
             form_lines["34"] = 0
-            form_lines["37"] = round(amount_owed, 2)  # Line 37: Amount you owe
+            form_lines["37"] = amount_owed  # Line 37: Amount you owe
         
-        print(f"\n=== CALCULATION COMPLETE ===")
-        return {
-            "total_income": wages,
-            "agi": wages,
-            "standard_deduction": deduction,
-            "taxable_income": taxable_income,
-            "tax_amount": tax,
-            "total_credits": total_child_credit + eitc,
-            "total_tax": tax_after_all,
-            "total_payments": form_lines["31"],
-            "refund": refund,
-            "amount_owed": amount_owed,
-            "form_1040_lines": form_lines,
-            "filing_status": self.filing_status
-        }
+        # Sums of cent amounts - round away float noise once, here
+        form_lines = {line: round(amount, 2) for line, amount in form_lines.items()}
+        
+        # Same lines as display strings, formatted once for every renderer
+        form_lines_str = {line: f"${amount:,.2f}" for line, amount in form_lines.items()}
+        
+        summary = (
+            ("total_income", wages),
+            ("agi", wages),
+            ("standard_deduction", deduction),
+            ("taxable_income", taxable_income),
+            ("tax_amount", form_lines["16"]),
+            ("total_credits", round(total_child_credit + eitc, 2)),
+            ("total_tax", form_lines["24"]),
+            ("total_payments", form_lines["31"]),
+            ("refund", form_lines["34"]),
+            ("amount_owed", form_lines["37"]),
+        )
+        return summary, tuple(form_lines.items()), tuple(form_lines_str.items())
     
-    def _calculate_tax_brackets(self, income: float, brackets: list) -> float:
-        """Calculate tax using bracket system."""
-        tax = 0.0
-        prev_bracket = 0
+    def calculate_tax_batch(self, returns):
+        """Calculate many returns at once, one row per filer.
         
-        for bracket_min, bracket_max, rate in brackets:
-            if income > bracket_min:
-                taxable_in_bracket = min(income, bracket_max) - max(bracket_min, prev_bracket)
-                tax += taxable_in_bracket * rate
-                prev_bracket = bracket_max
-            else:
-                break
+        ``returns`` is a DataFrame (or dict of columns) keyed like the
+        extracted data; the result is a DataFrame of the same Form 1040
+        lines plus refund and amount owed, all under this engine's
+        filing status.
+        """
+        import pandas as pd
+        
+        returns = pd.DataFrame(returns)
+        
+        def column(name):
+            if name in returns:
+                # Missing values count as 0, like calculate_tax's .get(name, 0)
+                return returns[name].fillna(0).to_numpy(dtype=np.float64)
+            return np.zeros(len(returns))
+        
+        wages = column("wages")
+        federal_withheld = column("federal_tax_withheld")
+        dependents = column("dependent_count")
+        
+        # ===== 1-3. DEDUCTION, TAXABLE INCOME AND TAX =====
+        deduction = self.STANDARD_DEDUCTIONS.get(self.filing_status, 14600)
+        taxable_income = np.maximum(0.0, wages - deduction)
+        brackets = self._BRACKETS.get(self.filing_status, self._BRACKETS["single"])
+        # Same rounding points as calculate_tax: tax and EITC settle to cents first
+        tax = _round_cents(self._calculate_tax_brackets(taxable_income, brackets))
         
-        return round(tax, 2)
+        # ===== 4. CREDITS =====
+        total_child_credit = self.CHILD_TAX_CREDIT * dependents
+        nonrefundable_child_credit = np.minimum(total_child_credit, tax)
+        additional_child_credit = np.minimum(total_child_credit - nonrefundable_child_credit,
+                                             self.ADDITIONAL_CHILD_TAX_CREDIT_MAX * dependents)
+        eitc = _round_cents(self._calculate_eitc(wages, dependents))
+        
+        # ===== 5-6. TAX AFTER CREDITS AND REFUND =====
+        tax_after_all = np.maximum(0.0, tax - nonrefundable_child_credit)
+        net = additional_child_credit + eitc + federal_withheld - tax_after_all
+        refund = _round_cents(np.maximum(0.0, net))
+        amount_owed = _round_cents(np.maximum(0.0, -net))
+        
+        # ===== 7. FORM 1040 LINES =====
+        return pd.DataFrame({
+            "1": _round_cents(wages),
+            "2b": _round_cents(column("interest_income")),
+            "3b": _round_cents(column("dividends")),
+            "7": _round_cents(wages),
+            "11": _round_cents(wages),
+            "12": round(deduction, 2),
+            "15": _round_cents(taxable_income),
+            "16": tax,
+            "19": _round_cents(nonrefundable_child_credit),
+            "27": eitc,
+            "28": _round_cents(additional_child_credit),
+            "24": _round_cents(tax_after_all),
+            "25a": _round_cents(federal_withheld),
+            "31": _round_cents(federal_withheld + additional_child_credit + eitc),
+            "34": refund,
+            "37": amount_owed,
+            "refund": refund,
+            "amount_owed": amount_owed,
+        }, index=returns.index)
     
-    def _calculate_eitc(self, wages: float, dependents: int) -> float:
-        """Calculate Earned Income Tax Credit for 2025."""
-        if dependents > 3:
-            dependents = 3
+    @classmethod
+    def _calculate_tax_brackets(cls, income, brackets: tuple):
+        """Calculate tax using bracket system (``income`` may be a 1-D array)."""
+        bracket_lo, bracket_hi, bracket_rate = brackets
+        if np.ndim(income):
+            # Batch: every income against every bracket in one broadcast
+            incomes = np.asarray(income, dtype=np.float64)[:, None]
+            in_bracket = np.clip(np.minimum(incomes, bracket_hi) - bracket_lo, 0.0, None)
+            # Add bracket by bracket like the scalar walk - a BLAS matmul sums in
+            # its own order and can land a half-cent tax on the other side
+            tax = np.zeros(len(in_bracket))
+            for i in range(len(bracket_rate)):
+                tax += in_bracket[:, i] * bracket_rate[i]
+            return tax
         
-        eitc_info = self.EITC_2025.get(dependents, self.EITC_2025[0])
+        return _tax_from_brackets(float(income), bracket_lo, bracket_hi, bracket_rate)
+    
+    @classmethod
+    def _calculate_eitc(cls, wages, dependents):
+        """Calculate Earned Income Tax Credit for 2025 (arrays of filers work too)."""
+        if np.ndim(wages) or np.ndim(dependents):
+            # Batch: gather each filer's table row, then one phase-out pass
+            wages = np.asarray(wages, dtype=np.float64)
+            row = np.clip(np.asarray(dependents, dtype=np.intp), 0, 3)
+            max_income = cls._EITC_MAX_INCOME[row]
+            max_credit = cls._EITC_MAX_CREDIT[row]
+            phased_out = np.maximum(0.0, max_credit - (wages - max_income) * cls._EITC_PHASEOUT[row])
+            return np.where(wages <= max_income, max_credit, phased_out)
         
-        if wages <= eitc_info["max_income"]:
-            return eitc_info["max_credit"]
-        else:
-            # Simplified phase-out
-            excess = wages - eitc_info["max_income"]
-            phaseout_rate = 0.1598 if dependents > 0 else 0.0765
-            credit = max(0, eitc_info["max_credit"] - (excess * phaseout_rate))
-            return round(credit, 2)
\ No newline at end of file
+        row = max(0, min(int(dependents), 3))
+        return _eitc_from_table(float(wages), cls._EITC_MAX_INCOME[row],
+                                cls._EITC_MAX_CREDIT[row], cls._EITC_PHASEOUT[row])
\ No newline at end of file
@@ -1,58 +1,73 @@
 import os
-import tempfile
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
 from typing import Dict, Any
 from fpdf import FPDF
+import pymupdf
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Form1040PDF:
     """Creates a professional-looking Form 1040 PDF."""
     
+    # Unsupported Unicode characters -> ASCII equivalents, applied in one
+    # str.translate pass
+    _SANITIZE_TABLE = str.maketrans({
+        "—": "-",    # em-dash to hyphen
+        "–": "-",    # en-dash to hyphen
+        "’": "'",    # curly apostrophe
+        "‘": "'",    # opening curly quote
+        "“": '"',    # opening double curly quote
+        "”": '"',    # closing double curly quote
+        "•": "*",    # bullet point
+        "…": "...",  # ellipsis
+        "°": "deg",  # degree symbol
+        "±": "+/-",  # plus-minus
+        "€": "EUR",  # Euro symbol
+        "£": "GBP",  # Pound symbol
+        "¥": "JPY",  # Yen symbol
+        "©": "(c)",  # Copyright
+        "®": "(R)",  # Registered trademark
+        "™": "(TM)", # Trademark
+        "☑": "[X]",  # Checked box
+        "☐": "[ ]",  # Unchecked box
+    })
+    
+    def __init__(self):
+        # Form 1040 rendered by the last create_filing_package() call
+        self.form_1040_bytes = None
+        # Filing instructions rendered by the last create_filing_package() call
+        self.instructions_bytes = None
+    
     def _sanitize_text(self, text):
         """Replace unsupported Unicode characters with ASCII equivalents."""
         if not isinstance(text, str):
             return text
         
-        replacements = {
-            "—": "-",    # em-dash to hyphen
-            "–": "-",    # en-dash to hyphen
-            "’": "'",    # curly apostrophe
-            "‘": "'",    # opening curly quote
-            "“": '"',    # opening double curly quote
-            "”": '"',    # closing double curly quote
-            "•": "*",    # bullet point
-            "…": "...",  # ellipsis
-            "°": "deg",  # degree symbol
-            "±": "+/-",  # plus-minus
-            "€": "EUR",  # Euro symbol
-            "£": "GBP",  # Pound symbol
-            "¥": "JPY",  # Yen symbol
-            "©": "(c)",  # Copyright
-            "®": "(R)",  # Registered trademark
-            "™": "(TM)", # Trademark
-            "☑": "[X]",  # Checked box
-            "☐": "[ ]",  # Unchecked box
-        }
-        
-        for char, replacement in replacements.items():
-            text = text.replace(char, replacement)
-        
-        return text
+        return text.translate(self._SANITIZE_TABLE)
     
     def create_form_1040(self, tax_data: Dict[str, Any], 
-                        extracted_data: Dict[str, Any]) -> str:
+                        extracted_data: Dict[str, Any]) -> bytes:
         """
         Create a complete, professional Form 1040 PDF.
         
         Returns:
-            Path to generated PDF file
+            The generated PDF document as bytes
         """
-        print("\n" + "="*50)
-        print("GENERATING FORM 1040")
-        print("="*50)
+        logger.debug("Generating Form 1040")
         
-        # Print status and results
-        self._print_tax_summary(tax_data, extracted_data)
+        # Line amounts shared by the summary and every section below
+        lines = tax_data.get("form_1040_lines", {})
+        # "$1,234.56" strings from the engine (formatted here for older results)
+        amounts = tax_data.get("form_1040_lines_str") or {
+            line: f"${amount:,.2f}" for line, amount in lines.items()
+        }
+        
+        # Log status and results (skipped entirely unless debugging)
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_tax_summary(tax_data, extracted_data, lines)
         
         # Create PDF
         pdf = FPDF(orientation='P', unit='mm', format='Letter')
@@ -71,16 +86,16 @@ class Form1040PDF:
         self._add_personal_info(pdf, extracted_data)
         
         # Income Section
-        self._add_income_section(pdf, tax_data)
+        self._add_income_section(pdf, amounts)
         
         # Adjusted Gross Income
-        self._add_agi_section(pdf, tax_data)
+        self._add_agi_section(pdf, amounts)
         
         # Deductions
-        self._add_deductions_section(pdf, tax_data)
+        self._add_deductions_section(pdf, amounts)
         
         # Taxable Income and Tax
-        self._add_tax_section(pdf, tax_data)
+        self._add_tax_section(pdf, amounts)
         
         # ===== PAGE 2 =====
         pdf.add_page()
@@ -91,13 +106,13 @@ class Form1040PDF:
         pdf.ln(5)
         
         # Credits
-        self._add_credits_section(pdf, tax_data)
+        self._add_credits_section(pdf, lines, amounts)
         
         # Payments
-        self._add_payments_section(pdf, tax_data)
+        self._add_payments_section(pdf, amounts)
         
         # Refund or Amount You Owe
-        self._add_refund_section(pdf, tax_data)
+        self._add_refund_section(pdf, amounts, tax_data.get("refund", 0))
         
         # Third Party Designee
         self._add_third_party_section(pdf)
@@ -108,18 +123,24 @@ class Form1040PDF:
         # Paid Preparer
         self._add_preparer_section(pdf)
         
-        # Save PDF
-        output_path = tempfile.mktemp(suffix='_Form1040.pdf')
-        pdf.output(output_path)
+        # Render PDF in memory
+        pdf_bytes = self._output_bytes(pdf)
         
-        print(f"\n✓ Form 1040 generated: {output_path}")
-        print("="*50)
-        return output_path
+        logger.debug("Form 1040 generated: %d bytes", len(pdf_bytes))
+        return pdf_bytes
     
-    def _print_tax_summary(self, tax_data, extracted_data):
-        """Print tax calculation summary to console."""
-        print(f"\n📊 TAX CALCULATION SUMMARY")
-        print(f"   {'─'*40}")
+    @staticmethod
+    def _output_bytes(pdf) -> bytes:
+        """Render an FPDF document to bytes (PyFPDF returns a latin-1 str)."""
+        output = pdf.output(dest='S')
+        if isinstance(output, str):
+            return output.encode('latin-1')
+        return bytes(output)
+    
+    def _log_tax_summary(self, tax_data, extracted_data, lines):
+        """Log the tax calculation summary at DEBUG level."""
+        logger.debug("📊 TAX CALCULATION SUMMARY")
+        logger.debug(f"   {'─'*40}")
         
         # Personal Info
         name = extracted_data.get("taxpayer_name", "N/A")
@@ -127,53 +148,52 @@ class Form1040PDF:
         status = tax_data.get("filing_status", "single").replace("_", " ").title()
         dependents = extracted_data.get("dependent_count", 0)
         
-        print(f"   Taxpayer: {name}")
-        print(f"   SSN: {ssn}")
-        print(f"   Filing Status: {status}")
-        print(f"   Dependents: {dependents}")
-        print(f"   {'─'*40}")
+        logger.debug(f"   Taxpayer: {name}")
+        logger.debug(f"   SSN: {ssn}")
+        logger.debug(f"   Filing Status: {status}")
+        logger.debug(f"   Dependents: {dependents}")
+        logger.debug(f"   {'─'*40}")
         
         # Income
-        lines = tax_data.get("form_1040_lines", {})
-        print(f"   INCOME:")
-        print(f"     Wages: ${lines.get('1', 0):,.2f}")
-        print(f"     Total Income: ${lines.get('7', 0):,.2f}")
-        print(f"     AGI: ${lines.get('11', 0):,.2f}")
-        print(f"   {'─'*40}")
+        logger.debug(f"   INCOME:")
+        logger.debug(f"     Wages: ${lines.get('1', 0):,.2f}")
+        logger.debug(f"     Total Income: ${lines.get('7', 0):,.2f}")
+        logger.debug(f"     AGI: ${lines.get('11', 0):,.2f}")
+        logger.debug(f"   {'─'*40}")
         
         # Deductions & Taxable Income
-        print(f"   DEDUCTIONS & TAX:")
-        print(f"     Standard Deduction: ${lines.get('12', 0):,.2f}")
-        print(f"     Taxable Income: ${lines.get('15', 0):,.2f}")
-        print(f"     Tax: ${lines.get('16', 0):,.2f}")
-        print(f"   {'─'*40}")
+        logger.debug(f"   DEDUCTIONS & TAX:")
+        logger.debug(f"     Standard Deduction: ${lines.get('12', 0):,.2f}")
+        logger.debug(f"     Taxable Income: ${lines.get('15', 0):,.2f}")
+        logger.debug(f"     Tax: ${lines.get('16', 0):,.2f}")
+        logger.debug(f"   {'─'*40}")
         
         # Credits
-        print(f"   CREDITS:")
-        print(f"     Child Tax Credit: ${lines.get('19', 0):,.2f}")
-        print(f"     EITC: ${lines.get('27', 0):,.2f}")
-        print(f"     Additional Child Tax Credit: ${lines.get('28', 0):,.2f}")
-        print(f"     Total Tax: ${lines.get('24', 0):,.2f}")
-        print(f"   {'─'*40}")
+        logger.debug(f"   CREDITS:")
+        logger.debug(f"     Child Tax Credit: ${lines.get('19', 0):,.2f}")
+        logger.debug(f"     EITC: ${lines.get('27', 0):,.2f}")
+        logger.debug(f"     Additional Child Tax Credit: ${lines.get('28', 0):,.2f}")
+        logger.debug(f"     Total Tax: ${lines.get('24', 0):,.2f}")
+        logger.debug(f"   {'─'*40}")
         
         # Payments & Results
-        print(f"   PAYMENTS:")
-        print(f"     Federal Tax Withheld: ${lines.get('25a', 0):,.2f}")
-        print(f"     Total Payments: ${lines.get('31', 0):,.2f}")
-        print(f"   {'─'*40}")
+        logger.debug(f"   PAYMENTS:")
+        logger.debug(f"     Federal Tax Withheld: ${lines.get('25a', 0):,.2f}")
+        logger.debug(f"     Total Payments: ${lines.get('31', 0):,.2f}")
+        logger.debug(f"   {'─'*40}")
         
         # Final Result
         refund = tax_data.get("refund", 0)
         owed = tax_data.get("amount_owed", 0)
         
         if refund > 0:
-            print(f"   🎉 RESULT: REFUND of ${refund:,.2f}")
-            print(f"     Line 34: ${lines.get('34', 0):,.2f}")
+            logger.debug(f"   🎉 RESULT: REFUND of ${refund:,.2f}")
+            logger.debug(f"     Line 34: ${lines.get('34', 0):,.2f}")
         else:
-            print(f"   💰 RESULT: AMOUNT OWED ${owed:,.2f}")
-            print(f"     Line 37: ${lines.get('37', 0):,.2f}")
+            logger.debug(f"   💰 RESULT: AMOUNT OWED ${owed:,.2f}")
+            logger.debug(f"     Line 37: ${lines.get('37', 0):,.2f}")
         
-        print(f"   {'─'*40}")
+        logger.debug(f"   {'─'*40}")
     
     def _add_header(self, pdf):
         """Add Form 1040 header."""
@@ -233,21 +253,17 @@ class Form1040PDF:
         name = extracted_data.get("taxpayer_name", "")
         # Sanitize name
         name = self._sanitize_text(name)
-        if " " in name:
-            first_part = name.split(" ")[0]
-            pdf.cell(50, 6, first_part, 'B', 0)
-        else:
-            pdf.cell(50, 6, name, 'B', 0)
+        # First and last word, without building a list (no last name for a
+        # single word)
+        first_part, space, rest = name.partition(" ")
+        last_part = rest.rpartition(" ")[2] if space else ""
+        pdf.cell(50, 6, first_part, 'B', 0)
         
         pdf.cell(20, 6, '', 0, 0)
         
         # Last Name
         pdf.cell(25, 6, 'Last name', 0, 0)
-        if " " in name:
-            last_part = name.split(" ")[-1]
-            pdf.cell(50, 6, last_part, 'B', 1)
-        else:
-            pdf.cell(50, 6, '', 'B', 1)
+        pdf.cell(50, 6, last_part, 'B', 1)
         
         pdf.ln(2)
         
@@ -276,57 +292,48 @@ class Form1040PDF:
         
         pdf.ln(10)
     
-    def _add_income_section(self, pdf, tax_data):
+    def _add_income_section(self, pdf, amounts):
         """Add income section lines."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Income', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
-        # Line 1: Wages
-        self._add_form_line(pdf, "1", "Wages, salaries, tips, etc.", lines.get("1", 0))
-        
-        # Line 1b: Federal income tax withheld
-        self._add_form_line(pdf, "1b", "Federal income tax withheld", lines.get("25a", 0))
-        
-        # Line 2b: Taxable interest
-        self._add_form_line(pdf, "2b", "Taxable interest", lines.get("2b", 0))
-        
-        # Line 3b: Qualified dividends
-        self._add_form_line(pdf, "3b", "Qualified dividends", lines.get("3b", 0))
-        
-        # Line 7: Total income
-        pdf.set_font('Arial', 'B', 10)
-        self._add_form_line(pdf, "7", "Add lines 1 through 6b", lines.get("7", 0))
+        self._add_form_lines(pdf, [
+            # Line 1: Wages
+            ("1", "Wages, salaries, tips, etc.", amounts.get("1", "$0.00")),
+            # Line 1b: Federal income tax withheld
+            ("1b", "Federal income tax withheld", amounts.get("25a", "$0.00")),
+            # Line 2b: Taxable interest
+            ("2b", "Taxable interest", amounts.get("2b", "$0.00")),
+            # Line 3b: Qualified dividends
+            ("3b", "Qualified dividends", amounts.get("3b", "$0.00")),
+            # Line 7: Total income
+            ("7", "Add lines 1 through 6b", amounts.get("7", "$0.00")),
+        ])
         
         pdf.ln(5)
     
-    def _add_agi_section(self, pdf, tax_data):
+    def _add_agi_section(self, pdf, amounts):
         """Add Adjusted Gross Income section."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Adjusted Gross Income', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
         # Line 11: AGI
         pdf.set_font('Arial', 'B', 10)
-        self._add_form_line(pdf, "11", "Adjusted gross income (AGI)", lines.get("11", 0))
+        self._add_form_line(pdf, "11", "Adjusted gross income (AGI)", amounts.get("11", "$0.00"))
         
         pdf.ln(5)
     
-    def _add_deductions_section(self, pdf, tax_data):
+    def _add_deductions_section(self, pdf, amounts):
         """Add deductions section."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Deductions', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
         # Standard deduction checkbox
         pdf.set_font('Arial', '', 10)
         pdf.cell(10, 6, "[X]", 0, 0)  # Changed from Unicode
         pdf.cell(40, 6, "Standard deduction", 0, 0)
         pdf.cell(100, 6, "", 0, 0)
-        pdf.cell(30, 6, f"${lines.get('12', 0):,.2f}", 0, 1, 'R')
+        pdf.cell(30, 6, amounts.get("12", "$0.00"), 0, 1, 'R')
         
         pdf.ln(2)
         
@@ -338,93 +345,86 @@ class Form1040PDF:
         
         # Line 15: Taxable income
         pdf.set_font('Arial', 'B', 10)
-        self._add_form_line(pdf, "15", "Taxable income", lines.get("15", 0))
+        self._add_form_line(pdf, "15", "Taxable income", amounts.get("15", "$0.00"))
         
         pdf.ln(10)
     
-    def _add_tax_section(self, pdf, tax_data):
+    def _add_tax_section(self, pdf, amounts):
         """Add tax calculation section."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Tax', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
         # Line 16: Tax
-        self._add_form_line(pdf, "16", "Tax", lines.get("16", 0))
+        self._add_form_line(pdf, "16", "Tax", amounts.get("16", "$0.00"))
         
         pdf.ln(5)
     
-    def _add_credits_section(self, pdf, tax_data):
+    def _add_credits_section(self, pdf, lines, amounts):
         """Add credits section on page 2."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Credits', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
-        # Line 19: Child tax credit
-        self._add_form_line(pdf, "19", "Child tax credit", lines.get("19", 0))
-        
-        # Line 27: Earned income credit (EITC)
-        self._add_form_line(pdf, "27", "Earned income credit (EITC)", lines.get("27", 0))
+        credit_lines = [
+            # Line 19: Child tax credit
+            ("19", "Child tax credit", amounts.get("19", "$0.00")),
+            # Line 27: Earned income credit (EITC)
+            ("27", "Earned income credit (EITC)", amounts.get("27", "$0.00")),
+        ]
         
         # Line 28: Additional child tax credit
         if lines.get("28", 0) > 0:
-            self._add_form_line(pdf, "28", "Additional child tax credit", lines.get("28", 0))
+            credit_lines.append(("28", "Additional child tax credit", amounts.get("28", "$0.00")))
+        
+        self._add_form_lines(pdf, credit_lines)
         
         pdf.ln(5)
         
         # Line 24: Total tax
         pdf.set_font('Arial', 'B', 10)
-        self._add_form_line(pdf, "24", "Total tax", lines.get("24", 0))
+        self._add_form_line(pdf, "24", "Total tax", amounts.get("24", "$0.00"))
         
         pdf.ln(10)
     
-    def _add_payments_section(self, pdf, tax_data):
+    def _add_payments_section(self, pdf, amounts):
         """Add payments section."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Payments', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        
         # Line 25a: Federal income tax withheld
-        self._add_form_line(pdf, "25a", "Federal income tax withheld", lines.get("25a", 0))
+        self._add_form_line(pdf, "25a", "Federal income tax withheld", amounts.get("25a", "$0.00"))
         
         pdf.ln(5)
         
         # Line 31: Total payments
         pdf.set_font('Arial', 'B', 10)
-        self._add_form_line(pdf, "31", "Total payments", lines.get("31", 0))
+        self._add_form_line(pdf, "31", "Total payments", amounts.get("31", "$0.00"))
         
         pdf.ln(10)
     
-    def _add_refund_section(self, pdf, tax_data):
+    def _add_refund_section(self, pdf, amounts, refund):
         """Add refund or amount owed section."""
         pdf.set_font('Arial', 'B', 12)
         pdf.cell(0, 8, 'Refund or Amount You Owe', 0, 1)
         
-        lines = tax_data.get("form_1040_lines", {})
-        refund = tax_data.get("refund", 0)
-        owed = tax_data.get("amount_owed", 0)
-        
         if refund > 0:
             # Line 34: Refund
             pdf.set_text_color(0, 128, 0)  # Green for refund
             pdf.set_font('Arial', 'B', 11)
-            self._add_form_line(pdf, "34", "REFUND", lines.get("34", 0))
+            self._add_form_line(pdf, "34", "REFUND", amounts.get("34", "$0.00"))
             pdf.set_text_color(0, 0, 0)  # Reset to black
             
             # Line 37: Amount you owe (0)
             pdf.set_font('Arial', '', 10)
-            self._add_form_line(pdf, "37", "Amount you owe", 0)
+            self._add_form_line(pdf, "37", "Amount you owe", "$0.00")
         else:
             # Line 34: Refund (0)
             pdf.set_font('Arial', '', 10)
-            self._add_form_line(pdf, "34", "Refund", 0)
+            self._add_form_line(pdf, "34", "Refund", "$0.00")
             
             # Line 37: Amount you owe
             pdf.set_text_color(255, 0, 0)  # Red for amount owed
             pdf.set_font('Arial', 'B', 11)
-            self._add_form_line(pdf, "37", "AMOUNT YOU OWE", lines.get("37", 0))
+            self._add_form_line(pdf, "37", "AMOUNT YOU OWE", amounts.get("37", "$0.00"))
             pdf.set_text_color(0, 0, 0)  # Reset to black
         
         pdf.ln(15)
@@ -459,7 +459,7 @@ class Form1040PDF:
         pdf.cell(60, 8, "Your signature", 0, 0)
         pdf.cell(40, 8, "", 'B', 0)
         pdf.cell(20, 8, "Date", 0, 0)
-        pdf.cell(30, 8, datetime.now().strftime("%m/%d/%Y"), 'B', 0)
+        pdf.cell(30, 8, self._signature_date(date.today()), 'B', 0)
         pdf.cell(20, 8, "Your occupation", 0, 0)
         pdf.cell(0, 8, "", 'B', 1)
         
@@ -501,37 +501,66 @@ class Form1040PDF:
         pdf.cell(40, 6, "Phone no.", 0, 0)
         pdf.cell(0, 6, "", 'B', 1)
     
-    def _add_form_line(self, pdf, line_num, description, amount):
+    def _add_form_line(self, pdf, line_num, description, amount_str):
         """Helper to add a form line with number, description, and amount."""
-        # Line number
+        self._add_form_lines(pdf, [(line_num, description, amount_str)])
+    
+    def _add_form_lines(self, pdf, items):
+        """Add consecutive form lines, switching font once per column."""
+        # Keep the block on one page so both columns line up
+        if pdf.y + 6 * len(items) > pdf.page_break_trigger:
+            pdf.add_page()
+        x, y = pdf.get_x(), pdf.get_y()
+        
+        # Line numbers
         pdf.set_font('Arial', 'B', 10)
-        pdf.cell(10, 6, line_num, 0, 0)
+        for line_num, _, _ in items:
+            pdf.cell(10, 6, line_num, 0, 2)
         
-        # Description
+        # Description and amount (right aligned)
         pdf.set_font('Arial', '', 10)
-        pdf.cell(100, 6, description, 0, 0)
-        
-        # Amount (right aligned)
-        pdf.cell(30, 6, f"${amount:,.2f}", 0, 1, 'R')
+        pdf.set_xy(x + 10, y)
+        for _, description, amount_str in items:
+            pdf.set_x(x + 10)
+            pdf.cell(100, 6, description, 0, 0)
+            pdf.cell(30, 6, amount_str, 0, 1, 'R')
     
     def create_filing_package(self, tax_data: Dict[str, Any], 
-                            extracted_data: Dict[str, Any]) -> str:
+                            extracted_data: Dict[str, Any]) -> bytes:
         """Create complete filing package with instructions."""
-        print("\n📦 Creating complete filing package...")
+        logger.debug("Creating complete filing package")
         
-        # Create Form 1040
-        form_path = self.create_form_1040(tax_data, extracted_data)
+        # Create Form 1040 (kept for callers that also offer it on its own)
+        form_bytes = self.create_form_1040(tax_data, extracted_data)
+        self.form_1040_bytes = form_bytes
         
         # Create instructions
-        instructions_path = self._create_instructions_pdf(tax_data, extracted_data)
+        self.instructions_bytes = self._create_instructions_pdf(tax_data, extracted_data)
         
-        print(f"✓ Filing package created")
+        # Merge: the form first, then the instruction pages
+        with pymupdf.open(stream=form_bytes, filetype="pdf") as package, \
+                pymupdf.open(stream=self.instructions_bytes, filetype="pdf") as instructions:
+            package.insert_pdf(instructions)
+            package_bytes = package.tobytes(garbage=3, deflate=True)
         
-        # Merge (for now, just return form)
-        return form_path
+        logger.debug("Filing package created")
+        return package_bytes
     
-    def _create_instructions_pdf(self, tax_data, extracted_data):
+    def _create_instructions_pdf(self, tax_data, extracted_data) -> bytes:
         """Create filing instructions (simplified for now)."""
+        # The instructions only change with the date - render them once a day
+        return self._render_instructions(date.today())
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _signature_date(today) -> str:
+        """MM/DD/YYYY for the signature line, formatted once per day."""
+        return today.strftime("%m/%d/%Y")
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _render_instructions(today) -> bytes:
+        """Render the static filing instructions PDF for the given date."""
         pdf = FPDF()
         pdf.add_page()
         
@@ -553,7 +582,7 @@ class Form1040PDF:
             "5. Keep copies for at least 3 years",
             "",
             f"Filing Deadline: April 15, 2026",
-            f"Generated: {datetime.now().strftime('%B %d, %Y')}",
+            f"Generated: {today.strftime('%B %d, %Y')}",
             "",
             "Need help? Visit IRS.gov or call 1-800-829-1040"
         ]
@@ -564,8 +593,4 @@ class Form1040PDF:
                 pdf.multi_cell(0, 6, line)
                 pdf.ln(2)
         
-        # Save
-        output_path = tempfile.mktemp(suffix='_Instructions.pdf')
-        pdf.output(output_path)
-        
-        return output_path
\ No newline at end of file
+        return Form1040PDF._output_bytes(pdf)
\ No newline at end of file
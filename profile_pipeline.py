@@ -0,0 +1,124 @@
+"""Profile the tax calculation and Form 1040 rendering over synthetic returns.
+
+    python profile_pipeline.py [count]
+
+Checks that calculate_tax_batch matches calculate_tax on every line, then
+prints how the time splits between IRSTaxEngine.calculate_tax and
+Form1040PDF.create_form_1040, the top functions from cProfile, and
+per-line timings when line_profiler is installed.
+"""
+import cProfile
+import io
+import pstats
+import random
+import sys
+import time
+
+from irs_rules_engine import IRSTaxEngine
+from pdf_filler import Form1040PDF
+
+FILING_STATUSES = ["single", "married_joint", "head_of_household"]
+
+
+def synthetic_returns(count, seed=2025):
+    """Distinct returns, so the calculate_tax cache never hits."""
+    rng = random.Random(seed)
+    return [
+        {
+            "taxpayer_name": "Whitney M. Refund",
+            "taxpayer_ssn": "400-00-4702",
+            "filing_status": rng.choice(FILING_STATUSES),
+            "dependent_count": rng.randint(0, 3),
+            "wages": round(rng.uniform(5000, 150000), 2),
+            "federal_tax_withheld": round(rng.uniform(0, 15000), 2),
+            "interest_income": round(rng.uniform(0, 500), 2),
+            "dividends": round(rng.uniform(0, 500), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def run_pipeline(returns):
+    """Calculate and render every return, timing each stage."""
+    engine = IRSTaxEngine()
+    filler = Form1040PDF()
+    calc_time = render_time = 0.0
+
+    for data in returns:
+        engine.filing_status = data["filing_status"]
+
+        start = time.perf_counter()
+        tax = engine.calculate_tax(data)
+        calc_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        filler.create_form_1040(tax, data)
+        render_time += time.perf_counter() - start
+
+    return calc_time, render_time
+
+
+def check_batch_matches_scalar(returns):
+    """Count rows where calculate_tax_batch and calculate_tax disagree."""
+    import pandas as pd
+
+    mismatches = 0
+    for status in IRSTaxEngine.STANDARD_DEDUCTIONS:
+        engine = IRSTaxEngine()
+        engine.filing_status = status
+        batch = engine.calculate_tax_batch(pd.DataFrame(returns))
+        for row, data in zip(batch.to_dict("records"), returns):
+            tax = engine.calculate_tax(data)
+            expected = {**tax["form_1040_lines"],
+                        "refund": tax["refund"], "amount_owed": tax["amount_owed"]}
+            if any(row[name] != amount for name, amount in expected.items()):
+                mismatches += 1
+    return mismatches
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    returns = synthetic_returns(count)
+
+    # Warm up (numba compilation, font tables) outside the measurements
+    run_pipeline(synthetic_returns(5, seed=0))
+    IRSTaxEngine._calculate_tax_cached.cache_clear()
+
+    # ===== BATCH VS SCALAR =====
+    mismatches = check_batch_matches_scalar(returns)
+    print(f"calculate_tax_batch vs calculate_tax: {mismatches} mismatched rows")
+    IRSTaxEngine._calculate_tax_cached.cache_clear()
+
+    # ===== STAGE SPLIT =====
+    calc_time, render_time = run_pipeline(returns)
+    total = calc_time + render_time
+    print(f"{count} returns in {total:.3f}s")
+    print(f"  calculate_tax:    {calc_time:.3f}s ({calc_time / total:.1%})")
+    print(f"  create_form_1040: {render_time:.3f}s ({render_time / total:.1%})")
+    IRSTaxEngine._calculate_tax_cached.cache_clear()
+
+    # ===== CPROFILE =====
+    profiler = cProfile.Profile()
+    profiler.runcall(run_pipeline, returns)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(20)
+    print(out.getvalue())
+    IRSTaxEngine._calculate_tax_cached.cache_clear()
+
+    # ===== LINE PROFILER (optional) =====
+    try:
+        from line_profiler import LineProfiler
+    except ImportError:
+        print("line_profiler not installed - skipping per-line timings")
+        return
+
+    line_profiler = LineProfiler()
+    line_profiler.add_function(IRSTaxEngine._calculate_tax_cached.__wrapped__)
+    line_profiler.add_function(Form1040PDF.create_form_1040)
+    line_profiler.add_function(Form1040PDF._add_form_lines)
+    line_profiler.runcall(run_pipeline, returns)
+    line_profiler.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,62 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
 # Page config
 st.set_page_config(page_title="Tax 1040 Tool", layout="wide")
 
+# Footer timestamp, taken once per script run (the downloads carry their own)
+_now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
 st.title("📊 IRS Form 1040 Tax Calculator")
 st.markdown("Simple tool to calculate your 2025 tax return")
 
-# Initialize session state
-if 'tax_data' not in st.session_state:
-    st.session_state.tax_data = None
+# Form 1040 lines shown in the results table, in display order
+LINE_MAP = {
+    "1": "Wages, salaries, tips",
+    "7": "Total income",
+    "11": "Adjusted Gross Income (AGI)",
+    "12": "Standard deduction",
+    "15": "Taxable income",
+    "16": "Tax",
+    "19": "Child tax credit",
+    "27": "Earned income credit",
+    "28": "Additional child tax credit",
+    "24": "Total tax",
+    "25a": "Federal income tax withheld",
+    "31": "Total payments",
+    "34": "Refund",
+    "37": "Amount you owe"
+}
+# Same lines as parallel tuples, matching tax_data["form_line_values"]
+LINE_KEYS = tuple(LINE_MAP)
+LINE_DESCS = tuple(LINE_MAP.values())
+# Lines listed even when they are zero
+FORCE_SHOW = frozenset({"12", "16", "24", "31", "34", "37"})
+
+# Simplified EITC: credit by dependent count (last entry covers more), paid
+# up to the wage cap
+EITC_BY_DEPS = (0.0, 4257.0, 4257.0, 4257.0, 4257.0)
+EITC_MAX_WAGES = 47900
 
-# Manual data entry
-st.header("📝 Enter Your Tax Information")
 
-col1, col2 = st.columns(2)
+# One row of the line details table
+_ROW_TPL = "<tr><td>{num}</td><td>{desc}</td><td style='text-align: right'>${amt:,.2f}</td></tr>"
 
-with col1:
-    name = st.text_input("Taxpayer Name", "Whitney M. Refund")
-    ssn = st.text_input("SSN", "400-00-4702")
-    status = st.selectbox(
-        "Filing Status",
-        ["Head of Household", "Single", "Married Filing Jointly"],
-        index=0
+
+@st.cache_data(show_spinner=False)
+def build_line_table(values: tuple) -> str:
+    """Line details HTML table for the LINE_KEYS amounts - built once per result."""
+    rows = "\n".join(
+        _ROW_TPL.format(num=line_num, desc=desc, amt=amount)
+        for line_num, desc, amount in zip(LINE_KEYS, LINE_DESCS, values)
+        if amount != 0 or line_num in FORCE_SHOW
     )
-    dependents = st.number_input("Dependents", min_value=0, max_value=10, value=1)
+    return f"<table><tr><th>Line</th><th>Description</th><th>Amount</th></tr>\n{rows}\n</table>"
 
-with col2:
-    wages = st.number_input("Wages", min_value=0.0, value=26263.0, step=1000.0)
-    fed_tax = st.number_input("Federal Tax Withheld", min_value=0.0, value=264.0, step=50.0)
-    interest = st.number_input("Interest Income", min_value=0.0, value=0.0, step=100.0)
-    dividends = st.number_input("Dividend Income", min_value=0.0, value=0.0, step=100.0)
-    daycare = st.number_input("Daycare Expenses", min_value=0.0, value=3100.0, step=100.0)
 
-# Calculate button
-if st.button("Calculate Tax", type="primary", use_container_width=True):
+@st.cache_data(show_spinner=False)
+def compute_tax(wages: float, fed_tax: float, dependents: int) -> dict:
+    """Calculations and form lines - the only inputs the arithmetic depends on."""
     # Simple tax calculation (Head of Household)
     standard_deduction = 21900.00  # HoH 2025
     taxable_income = max(0, wages - standard_deduction)
@@ -47,39 +68,22 @@ if st.button("Calculate Tax", type="primary", use_container_width=True):
         tax = 1160 + (taxable_income - 11600) * 0.12
     
     # Credits
-    child_credit = 2000.00 * dependents
-    eitc = 4257.00 if dependents >= 1 and wages <= 47900 else 0
+    child_credit = 2000 * dependents
+    eitc = EITC_BY_DEPS[min(dependents, len(EITC_BY_DEPS) - 1)] if wages <= EITC_MAX_WAGES else 0
     
     # Apply credits
-    tax_after_child = max(0, tax - min(child_credit, tax))
-    remaining_child = child_credit - min(child_credit, tax)
+    applied_child = min(child_credit, tax)
+    tax_after_child = max(0, tax - applied_child)
+    remaining_child = child_credit - applied_child
     additional_child = min(remaining_child, 1600 * dependents)
     
     # Total payments and refund
     total_payments = fed_tax + additional_child + eitc
-    refund = total_payments - tax_after_child
-    
-    if refund > 0:
-        amount_owed = 0
-    else:
-        amount_owed = abs(refund)
-        refund = 0
+    net = total_payments - tax_after_child
+    refund = max(net, 0.0)
+    amount_owed = max(-net, 0.0)
     
-    # Store in session state
-    st.session_state.tax_data = {
-        "taxpayer_info": {
-            "name": name,
-            "ssn": ssn,
-            "filing_status": status,
-            "dependents": dependents
-        },
-        "income": {
-            "wages": wages,
-            "fed_withheld": fed_tax,
-            "interest": interest,
-            "dividends": dividends,
-            "daycare": daycare
-        },
+    tax_data = {
         "calculations": {
             "standard_deduction": standard_deduction,
             "taxable_income": taxable_income,
@@ -98,7 +102,7 @@ if st.button("Calculate Tax", type="primary", use_container_width=True):
             "12": standard_deduction,
             "15": taxable_income,
             "16": tax,
-            "19": min(child_credit, tax),
+            "19": applied_child,
             "27": eitc,
             "28": additional_child,
             "24": tax_after_child,
@@ -109,6 +113,134 @@ if st.button("Calculate Tax", type="primary", use_container_width=True):
         }
     }
     
+    # Line amounts in LINE_KEYS order for the line details table
+    tax_data["form_line_values"] = tuple(tax_data["form_lines"][key] for key in LINE_KEYS)
+    
+    return tax_data
+
+
+def build_tax_data(wages: float, fed_tax: float, interest: float, dividends: float, daycare: float,
+                   dependents: int, status: str, name: str, ssn: str) -> dict:
+    """Tax data plus download payloads for one submission.
+    
+    Not cached: the name, SSN and "Generated" stamp stay in this session
+    instead of the process-wide cache.
+    """
+    import orjson  # only needed once something is calculated
+    
+    tax_data = {
+        "taxpayer_info": {
+            "name": name,
+            "ssn": ssn,
+            "filing_status": status,
+            "dependents": dependents
+        },
+        "income": {
+            "wages": wages,
+            "fed_withheld": fed_tax,
+            "interest": interest,
+            "dividends": dividends,
+            "daycare": daycare
+        },
+        **compute_tax(wages, fed_tax, dependents)
+    }
+    calc = tax_data["calculations"]
+    standard_deduction = calc["standard_deduction"]
+    taxable_income = calc["taxable_income"]
+    tax = calc["tax"]
+    child_credit = calc["child_credit"]
+    eitc = calc["eitc"]
+    additional_child = calc["additional_child"]
+    total_payments = calc["total_payments"]
+    refund = calc["refund"]
+    amount_owed = calc["amount_owed"]
+    
+    # Download payloads, formatted and encoded once per submission
+    generated = datetime.now()
+    if refund > 0:
+        result_line = f"REFUND: ${refund:,.2f}"
+    else:
+        result_line = f"AMOUNT OWED: ${amount_owed:,.2f}"
+    summary_txt = "\n".join((
+        "FORM 1040 TAX CALCULATION SUMMARY",
+        f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "TAXPAYER INFORMATION:",
+        f"Name: {name}",
+        f"SSN: {ssn}",
+        f"Filing Status: {status}",
+        f"Dependents: {dependents}",
+        "",
+        "INCOME & DEDUCTIONS:",
+        f"Wages: ${wages:,.2f}",
+        f"Standard Deduction: ${standard_deduction:,.2f}",
+        f"Taxable Income: ${taxable_income:,.2f}",
+        "",
+        "TAX & CREDITS:",
+        f"Tax: ${tax:,.2f}",
+        f"Child Tax Credit: ${child_credit:,.2f}",
+        f"Earned Income Credit: ${eitc:,.2f}",
+        f"Additional Child Credit: ${additional_child:,.2f}",
+        "",
+        "RESULT:",
+        f"Total Payments: ${total_payments:,.2f}",
+        result_line,
+        "",
+        "Instructions: Sign and date. Attach W-2s. Mail by April 15, 2026.",
+        "",
+    ))
+    json_data = {
+        "taxpayer": tax_data["taxpayer_info"],
+        "income": tax_data["income"],
+        "calculations": tax_data["calculations"],
+        "generated": generated.isoformat()
+    }
+    tax_data["summary_bytes"] = summary_txt.encode("utf-8")
+    tax_data["json_bytes"] = orjson.dumps(json_data, option=orjson.OPT_INDENT_2)
+    
+    return tax_data
+
+
+# Initialize session state
+if 'tax_data' not in st.session_state:
+    st.session_state.tax_data = None
+if 'input_values' not in st.session_state:
+    st.session_state.input_values = None
+
+# Manual data entry
+st.header("📝 Enter Your Tax Information")
+
+# Widgets inside a form only rerun the script when Calculate is pressed
+with st.form("tax_inputs"):
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        name = st.text_input("Taxpayer Name", "Whitney M. Refund")
+        ssn = st.text_input("SSN", "400-00-4702")
+        status = st.selectbox(
+            "Filing Status",
+            ["Head of Household", "Single", "Married Filing Jointly"],
+            index=0
+        )
+        dependents = st.number_input("Dependents", min_value=0, max_value=10, value=1)
+    
+    with col2:
+        wages = st.number_input("Wages", min_value=0.0, value=26263.0, step=1000.0)
+        fed_tax = st.number_input("Federal Tax Withheld", min_value=0.0, value=264.0, step=50.0)
+        interest = st.number_input("Interest Income", min_value=0.0, value=0.0, step=100.0)
+        dividends = st.number_input("Dividend Income", min_value=0.0, value=0.0, step=100.0)
+        daycare = st.number_input("Daycare Expenses", min_value=0.0, value=3100.0, step=100.0)
+    
+    # Calculate button
+    submitted = st.form_submit_button("Calculate Tax", type="primary", use_container_width=True)
+
+if submitted:
+    inputs = (wages, fed_tax, interest, dividends, daycare, dependents, status, name, ssn)
+    # Store in session state (resubmitting the same inputs keeps the stored result)
+    if inputs != st.session_state.input_values:
+        st.session_state.tax_data = build_tax_data(*inputs)
+        st.session_state.input_values = inputs
+    
     st.success("✅ Tax calculated successfully!")
 
 # Show results if we have data
@@ -149,36 +281,8 @@ if st.session_state.tax_data:
     # Form 1040 lines
     st.subheader("📄 Form 1040 Line Details")
     
-    lines = data["form_lines"]
-    line_data = []
-    
-    line_map = {
-        "1": "Wages, salaries, tips",
-        "7": "Total income",
-        "11": "Adjusted Gross Income (AGI)",
-        "12": "Standard deduction",
-        "15": "Taxable income",
-        "16": "Tax",
-        "19": "Child tax credit",
-        "27": "Earned income credit",
-        "28": "Additional child tax credit",
-        "24": "Total tax",
-        "25a": "Federal income tax withheld",
-        "31": "Total payments",
-        "34": "Refund",
-        "37": "Amount you owe"
-    }
-    
-    for line_num, desc in line_map.items():
-        amount = lines.get(line_num, 0)
-        if amount != 0 or line_num in ["12", "16", "24", "31", "34", "37"]:
-            line_data.append({
-                "Line": line_num,
-                "Description": desc,
-                "Amount": f"${amount:,.2f}"
-            })
-    
-    st.dataframe(pd.DataFrame(line_data), hide_index=True, use_container_width=True)
+    # Plain HTML - no dataframe serialization for a small static table
+    st.markdown(build_line_table(data["form_line_values"]), unsafe_allow_html=True)
     
     # Download section
     st.subheader("📥 Download Results")
@@ -186,55 +290,18 @@ if st.session_state.tax_data:
     col1, col2 = st.columns(2)
     
     with col1:
-        # Create simple text summary
-        summary = f"""FORM 1040 TAX CALCULATION SUMMARY
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-TAXPAYER INFORMATION:
-Name: {data['taxpayer_info']['name']}
-SSN: {data['taxpayer_info']['ssn']}
-Filing Status: {data['taxpayer_info']['filing_status']}
-Dependents: {data['taxpayer_info']['dependents']}
-
-INCOME & DEDUCTIONS:
-Wages: ${data['income']['wages']:,.2f}
-Standard Deduction: ${data['calculations']['standard_deduction']:,.2f}
-Taxable Income: ${data['calculations']['taxable_income']:,.2f}
-
-TAX & CREDITS:
-Tax: ${data['calculations']['tax']:,.2f}
-Child Tax Credit: ${data['calculations']['child_credit']:,.2f}
-Earned Income Credit: ${data['calculations']['eitc']:,.2f}
-Additional Child Credit: ${data['calculations']['additional_child']:,.2f}
-
-RESULT:
-Total Payments: ${data['calculations']['total_payments']:,.2f}
-{'REFUND: $' + str(data['calculations']['refund']) + ',.2f' if data['calculations']['refund'] > 0 else 'AMOUNT OWED: $' + str(data['calculations']['amount_owed']) + ',.2f'}
-
-Instructions: Sign and date. Attach W-2s. Mail by April 15, 2026.
-"""
-        
         st.download_button(
             label="📄 Download Tax Summary (TXT)",
-            data=summary,
+            data=data["summary_bytes"],
             file_name="Tax_Summary.txt",
-            mime="text/plain",
+            mime="text/plain; charset=utf-8",
             use_container_width=True
         )
     
     with col2:
-        # JSON download
-        json_data = {
-            "taxpayer": data["taxpayer_info"],
-            "income": data["income"],
-            "calculations": data["calculations"],
-            "generated": datetime.now().isoformat()
-        }
-        
-        import json
         st.download_button(
             label="📊 Download Data (JSON)",
-            data=json.dumps(json_data, indent=2),
+            data=data["json_bytes"],
             file_name="Tax_Data.json",
             mime="application/json",
             use_container_width=True
@@ -242,4 +309,4 @@ Instructions: Sign and date. Attach W-2s. Mail by April 15, 2026.
 
 # Footer
 st.markdown("---")
-st.caption(f"Based on IRS 2025 Tax Rules • Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
+st.caption(f"Based on IRS 2025 Tax Rules • Generated: {_now_str}")
\ No newline at end of file